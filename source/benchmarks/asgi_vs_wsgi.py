@@ -0,0 +1,108 @@
+"""
+Compare the concurrent-request throughput of the sync (WSGI) read endpoints with their async (ASGI) variants.
+
+Run from the source directory:
+
+    python -m benchmarks.asgi_vs_wsgi --concurrency 50 --requests 2000
+
+Both stacks are driven in process against a temporary test database: django.test.Client in a thread pool for
+WSGI and django.test.AsyncClient with asyncio tasks for ASGI, so the numbers compare request handling without
+network noise. To compare real servers, run `gunicorn project_config.wsgi` and
+`uvicorn project_config.asgi:application` and point an HTTP load generator at both.
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from .common import test_database
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, AsyncClient
+from hotel_app.models import Room, Booking
+
+
+User = get_user_model()
+
+# (name, WSGI url, ASGI url)
+ENDPOINTS = [
+    ("room list", "/api/rooms/", "/api/async/rooms/"),
+    ("room detail", "/api/rooms/1/", "/api/async/rooms/1/"),
+    ("booking list", "/api/bookings/", "/api/async/bookings/"),
+    ("booking detail", "/api/bookings/1/", "/api/async/bookings/1/"),
+    ("availability", "/api/rooms/available/?from_date=2026-01-10&to_date=2026-01-12",
+     "/api/async/rooms/available/?from_date=2026-01-10&to_date=2026-01-12"),
+]
+
+
+def seed(rooms: int, bookings_per_room: int) -> None:
+
+    customer = User.objects.create(email="benchmark@example.com", password="benchmark")
+    Room.objects.bulk_create(Room(number=f"Room {i}", size=25, price=100) for i in range(1, rooms + 1))
+
+    bookings = []
+    for room in Room.objects.all():
+        from_date = date(2026, 1, 1)
+        for _ in range(bookings_per_room):
+            bookings.append(Booking.create_booking(customer, from_date, from_date + timedelta(days=3), room))
+            from_date += timedelta(days=5)
+
+    Booking.bookings.bulk_create(bookings, batch_size=1000)
+
+
+def run_wsgi(url: str, concurrency: int, requests: int) -> float:
+
+    def worker(count):
+        client = Client()
+        try:
+            for _ in range(count):
+                assert client.get(url).status_code == 200
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, [requests // concurrency] * concurrency))
+
+    return (requests // concurrency * concurrency) / (time.perf_counter() - start)
+
+
+def run_asgi(url: str, concurrency: int, requests: int) -> float:
+
+    async def worker(client, count):
+        for _ in range(count):
+            assert (await client.get(url)).status_code == 200
+
+    async def main():
+        client = AsyncClient()
+        await asyncio.gather(*(worker(client, requests // concurrency) for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+
+    return (requests // concurrency * concurrency) / (time.perf_counter() - start)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients.")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint and stack.")
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--bookings-per-room", type=int, default=50)
+    args = parser.parse_args()
+
+    with test_database():
+        seed(args.rooms, args.bookings_per_room)
+
+        print(f"{'endpoint':<16}{'WSGI req/s':>12}{'ASGI req/s':>12}{'ratio':>8}")
+        for name, wsgi_url, asgi_url in ENDPOINTS:
+            wsgi = run_wsgi(wsgi_url, args.concurrency, args.requests)
+            asgi = run_asgi(asgi_url, args.concurrency, args.requests)
+            print(f"{name:<16}{wsgi:>12.1f}{asgi:>12.1f}{asgi / wsgi:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
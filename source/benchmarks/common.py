@@ -0,0 +1,37 @@
+import os
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project_config.settings")
+os.environ.setdefault("HOTEL_API_THROTTLING", "0") # load tests would be throttled
+django.setup()
+
+from django.test.utils import setup_test_environment, setup_databases, teardown_databases  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    """
+    Run the block against a temporary test database (created with migrations, destroyed at the end).
+    """
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+
+    if not sorted_values:
+        return 0.0
+
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+
+    return sorted_values[index]
@@ -0,0 +1,50 @@
+"""
+Compare two benchmark results saved by benchmarks.run:
+
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+
+METRICS = [("throughput", "req/s", True), ("p50_ms", "p50 ms", False), ("p95_ms", "p95 ms", False),
+           ("p99_ms", "p99 ms", False)]
+
+
+def change(old: float, new: float) -> str:
+
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Flag regressions larger than this percentage.")
+    args = parser.parse_args()
+
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    print(f"{old['commit']} -> {new['commit']}")
+
+    for name, new_result in new["scenarios"].items():
+        old_result = old["scenarios"].get(name)
+        if old_result is None:
+            continue
+
+        print(name)
+        for metric, label, higher_is_better in METRICS:
+            old_value, new_value = old_result[metric], new_result[metric]
+            regression = (new_value < old_value) if higher_is_better else (new_value > old_value)
+            flag = ""
+            if regression and old_value and abs(new_value - old_value) / old_value * 100 > args.threshold:
+                flag = "  <-- regression"
+            print(f"  {label:<8}{old_value:>10.2f}{new_value:>10.2f}{change(old_value, new_value):>9}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Latency and throughput benchmark of the main API paths.
+
+Run from the source directory, either in process against a temporary test database seeded with seed_hotel:
+
+    python -m benchmarks.run --concurrency 8 --requests 500
+
+or against a running local server using the same database (seed it first with `manage.py seed_hotel`):
+
+    python -m benchmarks.run --base-url http://localhost:8000
+
+Every scenario reports throughput and p50/p95/p99 latencies. Results are saved as JSON in benchmarks/results/
+(named after the current commit) and can be compared with `python -m benchmarks.compare old.json new.json`.
+"""
+
+import argparse
+import json
+import logging
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+from .common import test_database, percentile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from hotel_app.models import Room, Booking
+from users_app.models import CustomUser
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# contended bookings are made far after the seeded history, on a few rooms
+CONTENTION_START = date(2040, 1, 1)
+
+
+class InProcessClient:
+    """
+    Requests through django.test.Client (one per thread), without a server.
+    """
+
+    def __init__(self):
+
+        self.local = threading.local()
+
+    def request(self, method: str, path: str, data: dict=None) -> int:
+
+        if not hasattr(self.local, "client"):
+            self.local.client = Client()
+
+        body = json.dumps(data) if data is not None else None
+
+        return self.local.client.generic(method, path, body or "", content_type="application/json").status_code
+
+    def close(self):
+
+        connection.close() # each thread has its own database connection
+
+
+class HttpClient:
+    """
+    Requests to a running server.
+    """
+
+    def __init__(self, base_url: str):
+
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method: str, path: str, data: dict=None) -> int:
+
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def close(self):
+
+        connection.close()
+
+
+class Scenarios:
+    """
+    Each scenario makes one request and returns its status code. ok_statuses lists the expected ones (a 409 is an
+    expected answer when bookings contend for the same room).
+    """
+
+    ok_statuses = {
+        "room_list": {200},
+        "room_detail": {200},
+        "availability": {200},
+        "booking_create_contention": {201, 409},
+        "booking_update": {200, 409},
+    }
+
+    def __init__(self, client, hot_rooms: int):
+
+        self.client = client
+        self.room_ids = list(Room.objects.order_by("id").values_list("id", flat=True))
+        self.booking_ids = list(Booking.bookings.order_by("id").values_list("id", flat=True)[:10000])
+        self.customer_ids = list(CustomUser.objects.order_by("id").values_list("id", flat=True)[:1000])
+        self.hot_room_ids = self.room_ids[:hot_rooms]
+
+        if not self.room_ids or not self.booking_ids or not self.customer_ids:
+            raise SystemExit("The database has no rooms, bookings or users: seed it with manage.py seed_hotel.")
+
+    def room_list(self, rng: random.Random) -> int:
+
+        return self.client.request("GET", "/api/rooms/")
+
+    def room_detail(self, rng: random.Random) -> int:
+
+        return self.client.request("GET", f"/api/rooms/{rng.choice(self.room_ids)}/")
+
+    def availability(self, rng: random.Random) -> int:
+
+        from_date = date(2025, 1, 1) + timedelta(days=rng.randint(0, 365))
+        to_date = from_date + timedelta(days=rng.randint(1, 7))
+
+        return self.client.request("GET", f"/api/rooms/available/?from_date={from_date}&to_date={to_date}")
+
+    def booking_create_contention(self, rng: random.Random) -> int:
+
+        from_date = CONTENTION_START + timedelta(days=rng.randint(0, 60))
+        payload = {
+            "customer": rng.choice(self.customer_ids),
+            "room": rng.choice(self.hot_room_ids),
+            "from_date": str(from_date),
+            "to_date": str(from_date + timedelta(days=rng.randint(1, 5))),
+        }
+
+        return self.client.request("POST", "/api/bookings/", payload)
+
+    def booking_update(self, rng: random.Random) -> int:
+
+        booking_id = rng.choice(self.booking_ids)
+        from_date = CONTENTION_START + timedelta(days=rng.randint(100, 3000))
+        payload = {"from_date": str(from_date), "to_date": str(from_date + timedelta(days=rng.randint(1, 5)))}
+
+        return self.client.request("PATCH", f"/api/bookings/{booking_id}/", payload)
+
+
+def run_scenario(scenarios: Scenarios, name: str, concurrency: int, requests: int, seed: int) -> dict:
+
+    scenario = getattr(scenarios, name)
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker(worker_index):
+        rng = random.Random(seed * 1000 + worker_index)
+        worker_latencies = []
+        worker_statuses = Counter()
+        try:
+            for _ in range(requests // concurrency):
+                start = time.perf_counter()
+                worker_statuses[scenario(rng)] += 1
+                worker_latencies.append(time.perf_counter() - start)
+        finally:
+            scenarios.client.close()
+
+        with lock:
+            latencies.extend(worker_latencies)
+            statuses.update(worker_statuses)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status not in Scenarios.ok_statuses[name])
+
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def print_results(results: dict) -> None:
+
+    print(f"{'scenario':<28}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['errors']:>8}")
+
+
+def git_commit() -> str:
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results: dict, args: argparse.Namespace) -> Path:
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    commit = git_commit()
+    path = RESULTS_DIR / f"{commit}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.write_text(json.dumps({
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "target": args.base_url or "in-process",
+        "scenarios": results,
+    }, indent=2))
+
+    return path
+
+
+def run(args: argparse.Namespace) -> dict:
+
+    client = HttpClient(args.base_url) if args.base_url else InProcessClient()
+    scenarios = Scenarios(client, args.hot_rooms)
+
+    return {
+        name: run_scenario(scenarios, name, args.concurrency, args.requests, args.seed)
+        for name in args.scenarios
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the in-process test client.")
+    parser.add_argument("--scenarios", nargs="+", default=list(Scenarios.ok_statuses),
+                        choices=list(Scenarios.ok_statuses))
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario.")
+    parser.add_argument("--hot-rooms", type=int, default=5, help="Rooms shared by the contended booking creations.")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the data and the requests.")
+    parser.add_argument("--users", type=int, default=1000, help="Seeded users (in-process only).")
+    parser.add_argument("--rooms", type=int, default=500, help="Seeded rooms (in-process only).")
+    parser.add_argument("--bookings", type=int, default=50000, help="Seeded bookings (in-process only).")
+    parser.add_argument("--no-save", action="store_true", help="Don't save the results.")
+    args = parser.parse_args()
+
+    logging.getLogger("django.request").setLevel(logging.ERROR) # 409 answers are expected, don't log them
+
+    if args.base_url:
+        results = run(args)
+    else:
+        with test_database():
+            call_command("seed_hotel", users=args.users, rooms=args.rooms, bookings=args.bookings, seed=args.seed,
+                         stdout=StringIO())
+            results = run(args)
+
+    print_results(results)
+
+    if not args.no_save:
+        print(f"Results saved to {save_results(results, args)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import RateRule, StayDiscount
 
 # Register your models here.
+
+
+@admin.register(RateRule)
+class RateRuleAdmin(admin.ModelAdmin):
+
+    list_display = ("name", "room", "from_date", "to_date", "weekdays", "price", "percent", "priority")
+    list_filter = ("room",)
+
+
+@admin.register(StayDiscount)
+class StayDiscountAdmin(admin.ModelAdmin):
+
+    list_display = ("room", "min_nights", "percent")
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+from datetime import date
+from project_config.throttling import async_throttled
+from ..models import Room, Booking
+from .serializers import RoomSerializer, RoomAvailabilitySerializer, BookingSerializer
+
+# Async (ASGI) variants of the read endpoints, written as plain Django async views on top of the async ORM (DRF
+# views are sync only). Under an ASGI server they don't hold a worker thread while waiting for the database. Lists
+# use keyset pagination: ?after=<cursor of the last item>&page_size=<n>. They are throttled along with the rooms
+# and bookings endpoints.
+
+
+def _page_size(request) -> int:
+
+    try:
+        page_size = int(request.GET.get("page_size", settings.API_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.API_PAGE_SIZE
+
+    return max(1, min(page_size, settings.API_MAX_PAGE_SIZE))
+
+
+def _page_response(request, items: list, page_size: int, cursor_of, serializer_class) -> JsonResponse:
+    """
+    Response with a page of items (fetched with one extra item to know if there is a next page).
+    """
+
+    next_url = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        query = request.GET.copy()
+        query["after"] = cursor_of(items[-1])
+        next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+    return JsonResponse({"next": next_url, "results": serializer_class(items, many=True).data})
+
+
+def _not_found(model) -> JsonResponse:
+
+    return JsonResponse({"detail": f"No {model.__name__} matches the given query."}, status=404)
+
+
+@async_throttled("room")
+async def room_list(request):
+
+    page_size = _page_size(request)
+    rooms = Room.objects.order_by("id")
+
+    if request.GET.get("after", "").isdigit():
+        rooms = rooms.filter(id__gt=int(request.GET["after"]))
+
+    items = [room async for room in rooms[:page_size + 1]]
+
+    return _page_response(request, items, page_size, lambda room: room.id, RoomSerializer)
+
+
+@async_throttled("room")
+async def room_detail(request, pk):
+
+    try:
+        room = await Room.objects.aget(pk=pk)
+    except Room.DoesNotExist:
+        return _not_found(Room)
+
+    return JsonResponse(RoomSerializer(room).data)
+
+
+@async_throttled("room")
+async def room_available(request):
+
+    query_serializer = RoomAvailabilitySerializer(data=request.GET)
+
+    if not query_serializer.is_valid():
+        return JsonResponse(query_serializer.errors, status=400)
+
+    page_size = _page_size(request)
+    rooms = Room.objects.available(**query_serializer.validated_data).order_by("id")
+
+    if request.GET.get("after", "").isdigit():
+        rooms = rooms.filter(id__gt=int(request.GET["after"]))
+
+    items = [room async for room in rooms[:page_size + 1]]
+
+    return _page_response(request, items, page_size, lambda room: room.id, RoomSerializer)
+
+
+@async_throttled("booking")
+async def booking_list(request):
+
+    page_size = _page_size(request)
+    bookings = Booking.bookings.order_by("from_date", "id")
+
+    # the cursor is "<from_date>,<id>" of the last booking of the previous page
+    after_date, _, after_id = request.GET.get("after", "").partition(",")
+    try:
+        after_date = date.fromisoformat(after_date)
+    except ValueError:
+        after_date = None
+
+    if after_date is not None and after_id.isdigit():
+        bookings = bookings.filter(
+            Q(from_date__gt=after_date) | Q(from_date=after_date, id__gt=int(after_id))
+        )
+
+    items = [booking async for booking in bookings[:page_size + 1]]
+
+    return _page_response(request, items, page_size, lambda booking: f"{booking.from_date},{booking.id}",
+                          BookingSerializer)
+
+
+@async_throttled("booking")
+async def booking_detail(request, pk):
+
+    try:
+        booking = await Booking.bookings.aget(pk=pk)
+    except Booking.DoesNotExist:
+        return _not_found(Booking)
+
+    return JsonResponse(BookingSerializer(booking).data)
@@ -0,0 +1,99 @@
+import hashlib
+from collections.abc import Callable
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified support for the retrieve and list actions of a model viewset.
+
+    Object validators are computed from the updated_at column with a single light query (no objects are fetched or
+    serialized), so requests with a matching If-None-Match (or If-Modified-Since) get a 304 without doing the work.
+    List validators come from a collection version when the viewset maintains one, otherwise from the rows of the
+    requested page (a 304 then only saves the serialization and the transfer, but no query scans the collection).
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+
+        return self.conditional_response(self.get_object_validators(),
+                                         lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+    def list(self, request, *args, **kwargs):
+
+        validators = self.get_collection_validators()
+
+        if validators is not None:
+            return self.conditional_response(validators,
+                                             lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+        # no collection version: the ETag comes from the rows of the page, which are fetched anyway
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+
+        return self.conditional_response(self.get_page_validators(page),
+                                         lambda: self.get_paginated_response(self.get_serializer(page, many=True).data))
+
+    def get_object_validators(self) -> tuple[str, object] | None:
+        """
+        ETag and last modification datetime of the requested object, or None if it doesn't exist.
+        """
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        row = self.filter_queryset(self.get_queryset()).filter(**lookup).values_list("pk", "updated_at").first()
+
+        if row is None:
+            return None
+
+        pk, updated_at = row
+
+        return f'"{pk}-{int(updated_at.timestamp() * 1_000_000)}"', updated_at
+
+    def get_collection_validators(self) -> tuple[str, object] | None:
+        """
+        ETag of the requested page of the collection known without reading it (e.g. from a version bumped whenever
+        the collection changes), or None to build it from the rows of the page.
+        """
+
+        return None
+
+    def get_page_validators(self, page: list) -> tuple[str, object]:
+        """
+        ETag of a page of the collection, which changes when any of its objects is updated, when objects enter or
+        leave it, or when pages appear before or after it (its links change). No Last-Modified is given because
+        deleting an object doesn't change it.
+        """
+
+        rows = ",".join(f"{obj.pk}-{int(obj.updated_at.timestamp() * 1_000_000)}" for obj in page)
+        links = f"{getattr(self.paginator, 'has_previous', False):d}{getattr(self.paginator, 'has_next', False):d}"
+
+        return self.collection_etag(f"{rows}:{links}"), None
+
+    def collection_etag(self, collection_version: str) -> str:
+
+        # query parameters select the page, the filters and the ordering
+        return f'"{hashlib.md5(f"{collection_version}:{self.request.get_full_path()}".encode()).hexdigest()}"'
+
+    def conditional_response(self, validators: tuple[str, object] | None, get_response: Callable[[], Response]):
+        """
+        Return a 304 response if the request's preconditions match the validators, or the response built by
+        get_response otherwise, with the ETag and Last-Modified headers set.
+        """
+
+        if validators is None:
+            return get_response()
+
+        etag, last_modified = validators
+        last_modified_timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified_timestamp)
+        if response is None:
+            response = get_response()
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified_timestamp is not None:
+                response["Last-Modified"] = http_date(last_modified_timestamp)
+
+        return response
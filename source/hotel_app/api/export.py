@@ -0,0 +1,43 @@
+import csv
+import json
+from collections.abc import Iterable, Iterator
+
+
+EXPORT_FIELDS = ["id", "customer", "room", "from_date", "to_date", "price"]
+
+
+class Echo:
+    """
+    File-like object that returns what is written into it instead of buffering it (used by csv.writer).
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def bookings_to_ndjson(rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Render booking rows (values_list of EXPORT_FIELDS) as newline delimited JSON, one line per booking.
+    """
+
+    for booking_id, customer_id, room_id, from_date, to_date, price in rows:
+        yield json.dumps({
+            "id": booking_id,
+            "customer": customer_id,
+            "room": room_id,
+            "from_date": from_date.isoformat(),
+            "to_date": to_date.isoformat(),
+            "price": price,
+        }) + "\n"
+
+
+def bookings_to_csv(rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Render booking rows (values_list of EXPORT_FIELDS) as CSV, with a header line.
+    """
+
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,36 @@
+from django_filters import rest_framework as filters
+from ..models import Room, Booking
+
+# Every filter (and ordering field) is backed by an index of its model, see Room.Meta and Booking.Meta.
+
+
+class RoomFilter(filters.FilterSet):
+
+    size_min = filters.NumberFilter(field_name="size", lookup_expr="gte")
+    size_max = filters.NumberFilter(field_name="size", lookup_expr="lte")
+    price_min = filters.NumberFilter(field_name="price", lookup_expr="gte")
+    price_max = filters.NumberFilter(field_name="price", lookup_expr="lte")
+
+    class Meta:
+
+        model = Room
+        fields = []
+
+
+class BookingFilter(filters.FilterSet):
+
+    # plain ids, so filtering doesn't query the customer or room first
+    customer = filters.NumberFilter(field_name="customer_id")
+    room = filters.NumberFilter(field_name="room_id")
+
+    # bookings overlapping the [overlaps_from, overlaps_to) stay (either bound can be omitted)
+    overlaps_from = filters.DateFilter(field_name="to_date", lookup_expr="gt")
+    overlaps_to = filters.DateFilter(field_name="from_date", lookup_expr="lt")
+
+    price_min = filters.NumberFilter(field_name="price", lookup_expr="gte")
+    price_max = filters.NumberFilter(field_name="price", lookup_expr="lte")
+
+    class Meta:
+
+        model = Booking
+        fields = []
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+# Idempotency keys: a client sends an Idempotency-Key header (e.g. a UUID) with a write, and retries it with the same
+# key. The first request runs and its successful response is stored in the cache for IDEMPOTENCY_KEY_TTL seconds;
+# retries get the stored response back (with an Idempotent-Replayed header) without running the view again. While
+# the first request runs, the key holds an in-progress marker (created with cache.add, so that a single request
+# runs even with concurrent retries) and retries get a 409. Failed requests (non 2xx) don't keep the key, so they
+# can be retried with it. A key reused for a different request (method, path or body) gets a 422.
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def get_cache():
+
+    return caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+
+
+def cache_key(request, key: str) -> str:
+
+    # keys are scoped to the user; anonymous clients share a scope (keys are meant to be random)
+    owner = request.user.pk if request.user and request.user.is_authenticated else "anonymous"
+    key_hash = hashlib.sha256(key.encode()).hexdigest() # keeps keys short and valid for every cache backend
+
+    return f"idempotency:{owner}:{key_hash}"
+
+
+def request_fingerprint(request) -> str:
+
+    body = json.dumps(request.data, sort_keys=True, default=str)
+
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def stored_response(stored: dict, fingerprint: str) -> Response:
+
+    if stored["fingerprint"] != fingerprint:
+        return Response({"detail": f"This {HEADER} was used for a different request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    if stored["status"] is None:
+        return Response({"detail": f"A request with this {HEADER} is in progress."}, status=status.HTTP_409_CONFLICT)
+
+    return Response(stored["data"], status=stored["status"], headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(handler):
+    """
+    Decorator of viewset handlers (create, update, actions...) adding Idempotency-Key support.
+    """
+
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+
+        key = request.headers.get(HEADER)
+
+        if key is None:
+            return handler(self, request, *args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response({"detail": f"{HEADER} must have 1 to {MAX_KEY_LENGTH} characters."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        cache = get_cache()
+        key = cache_key(request, key)
+        fingerprint = request_fingerprint(request)
+
+        # the marker expires, so that a request killed before storing its response doesn't lock the key forever
+        if not cache.add(key, {"fingerprint": fingerprint, "status": None},
+                         timeout=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT):
+            stored = cache.get(key)
+            if stored is not None:
+                return stored_response(stored, fingerprint)
+            # the marker expired in between, the client can retry
+            return Response({"detail": f"A request with this {HEADER} is in progress."},
+                            status=status.HTTP_409_CONFLICT)
+
+        try:
+            response = handler(self, request, *args, **kwargs)
+        except BaseException:
+            cache.delete(key)
+            raise
+
+        if status.is_success(response.status_code):
+            cache.set(key, {"fingerprint": fingerprint, "status": response.status_code, "data": response.data},
+                      timeout=settings.IDEMPOTENCY_KEY_TTL)
+        else:
+            cache.delete(key)
+
+        return response
+
+    return wrapper
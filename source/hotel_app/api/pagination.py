@@ -0,0 +1,142 @@
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: every page is an index seek from the last row of the previous page, so there are no
+    OFFSET scans and no COUNT(*) queries. Default page size is API_PAGE_SIZE, clients can ask for another one with
+    ?page_size= up to API_MAX_PAGE_SIZE.
+
+    Unlike CursorPagination, which only keeps the first ordering field in the cursor and skips the rows sharing it
+    with an OFFSET (limited to offset_cutoff rows), the cursor holds the values of every ordering field of the last
+    row, and the next page starts after them: (a, b) > (x, y) is a >= x AND (a > x OR (a = x AND b > y)). Orderings
+    end with the primary key, so they are unique.
+    """
+
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (False, None) if self.cursor is None else (self.cursor.reverse, self.cursor.position)
+
+        if reverse:
+            queryset = queryset.order_by(*[self._reversed(order) for order in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            queryset = queryset.filter(self.after(queryset.model, position, reverse))
+
+        # an extra row tells if there's a page following this one
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, following
+        else:
+            self.has_next, self.has_previous = following, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    @staticmethod
+    def _reversed(order: str) -> str:
+
+        return order[1:] if order.startswith("-") else f"-{order}"
+
+    def after(self, model, position: str, reverse: bool) -> Q:
+        """
+        Rows following the cursor position in the order of the page.
+        """
+
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            values = [model._meta.get_field(order.lstrip("-")).to_python(value)
+                      for order, value in zip(self.ordering, values)]
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        lookups = []
+        for order in self.ordering:
+            descending = order.startswith("-") != reverse
+            lookups.append((order.lstrip("-"), "lt" if descending else "gt", "lte" if descending else "gte"))
+
+        # the first field bounds the index range, the others break its ties
+        field, strict, _ = lookups[-1]
+        condition = Q(**{f"{field}__{strict}": values[-1]})
+        for (field, strict, _), value in reversed(list(zip(lookups[:-1], values[:-1]))):
+            condition = Q(**{f"{field}__{strict}": value}) | (Q(**{field: value}) & condition)
+
+        field, _, inclusive = lookups[0]
+
+        return Q(**{f"{field}__{inclusive}": values[0]}) & condition
+
+    def get_ordering(self, request, queryset, view):
+
+        ordering = super().get_ordering(request, queryset, view)
+
+        # orderings of the OrderingFilter (?ordering=price) aren't unique: the primary key breaks their ties
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            ordering = (*ordering, "id")
+
+        return ordering
+
+    def _get_position_from_instance(self, instance, ordering):
+
+        values = [instance[order.lstrip("-")] if isinstance(instance, dict) else getattr(instance, order.lstrip("-"))
+                  for order in ordering]
+
+        return json.dumps([str(value) for value in values])
+
+    def get_next_link(self):
+
+        if not self.has_next:
+            return None
+
+        if not self.page: # before the first row, go forward from the start
+            return self.encode_cursor(Cursor(offset=0, reverse=False, position=None))
+
+        return self.encode_cursor(Cursor(offset=0, reverse=False,
+                                         position=self._get_position_from_instance(self.page[-1], self.ordering)))
+
+    def get_previous_link(self):
+
+        if not self.has_previous:
+            return None
+
+        if not self.page: # past the last row, go back from the end
+            return self.encode_cursor(Cursor(offset=0, reverse=True, position=None))
+
+        return self.encode_cursor(Cursor(offset=0, reverse=True,
+                                         position=self._get_position_from_instance(self.page[0], self.ordering)))
+
+
+class RoomPagination(KeysetPagination):
+
+    ordering = "id"
+
+
+class BookingPagination(KeysetPagination):
+
+    ordering = ("from_date", "id") # served by booking_from_date_id_idx
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from ..models import Room, Booking
+from ..reports import MAX_REPORT_MONTHS, months_between
 
 class RoomSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,6 +11,39 @@ class RoomSerializer(serializers.ModelSerializer):
         fields = ["number", "size", "price"]
 
 
+class RoomAvailabilitySerializer(serializers.Serializer):
+    """
+    Serializer for validating the query parameters of the availability search (available action).
+    """
+
+    from_date = serializers.DateField()
+    to_date = serializers.DateField()
+
+    def validate(self, data):
+
+        if data["to_date"] <= data["from_date"]:
+            raise serializers.ValidationError("to_date must be greater than from_date.")
+
+        return data
+
+
+class RoomCalendarSerializer(RoomAvailabilitySerializer):
+    """
+    Serializer for validating the query parameters of the availability calendar (calendar action).
+    """
+
+    max_nights = 366 * 2
+
+    def validate(self, data):
+
+        data = super().validate(data)
+
+        if (data["to_date"] - data["from_date"]).days > self.max_nights:
+            raise serializers.ValidationError(f"The calendar can't be longer than {self.max_nights} nights.")
+
+        return data
+
+
 class BookingSerializer(serializers.ModelSerializer):
     """
     Serializer for listing bookings (list and retrieve actions).
@@ -52,3 +86,95 @@ class UpdateBookingSerializer(serializers.ModelSerializer):
             "to_date": {"required": False}
         }
 
+
+
+class BulkBookingSerializer(serializers.Serializer):
+    """
+    Serializer for validating each booking of a bulk creation (bulk action). Customers and rooms are plain ids,
+    checked all at once by BookingManager.create_bookings instead of one query per booking.
+    """
+
+    customer = serializers.IntegerField()
+    room = serializers.IntegerField()
+    from_date = serializers.DateField()
+    to_date = serializers.DateField()
+
+    def validate(self, data):
+
+        if data["to_date"] <= data["from_date"]:
+            raise serializers.ValidationError("to_date must be greater than from_date.")
+
+        return data
+
+
+class RevenueReportSerializer(RoomAvailabilitySerializer):
+    """
+    Serializer for validating the query parameters of the revenue report (revenue action). group_by is a comma
+    separated list of room, customer and month.
+    """
+
+    group_by_choices = ("room", "customer", "month")
+
+    group_by = serializers.CharField(required=False, default="")
+
+    def validate_group_by(self, value):
+
+        group_by = [key.strip() for key in value.split(",") if key.strip()]
+
+        for key in group_by:
+            if key not in self.group_by_choices:
+                raise serializers.ValidationError(f"\"{key}\" is not one of: {', '.join(self.group_by_choices)}.")
+
+        return group_by
+
+    def validate(self, data):
+
+        data = super().validate(data)
+
+        if "month" in data["group_by"] and len(months_between(data["from_date"], data["to_date"])) > MAX_REPORT_MONTHS:
+            raise serializers.ValidationError(f"Reports by month can't cover more than {MAX_REPORT_MONTHS} months.")
+
+        return data
+
+
+class QuoteStaySerializer(RoomAvailabilitySerializer):
+    """
+    Serializer for validating each stay of a quote request (room is a plain id).
+    """
+
+    max_nights = 366 # stays are priced night by night
+
+    room = serializers.IntegerField()
+
+    def validate(self, data):
+
+        data = super().validate(data)
+
+        if (data["to_date"] - data["from_date"]).days > self.max_nights:
+            raise serializers.ValidationError(f"A stay can't be longer than {self.max_nights} nights.")
+
+        return data
+
+
+class QuoteSerializer(serializers.Serializer):
+    """
+    Serializer for validating quote requests: a list of stays, or a stay (from_date and to_date) in every room
+    matching the filters (those of the rooms list), quoted a page of rooms at a time.
+    """
+
+    max_stays = 1000
+
+    stays = QuoteStaySerializer(many=True, required=False, max_length=max_stays)
+    from_date = serializers.DateField(required=False)
+    to_date = serializers.DateField(required=False)
+    filters = serializers.DictField(required=False)
+
+    def validate(self, data):
+
+        if "stays" in data:
+            return data
+
+        if "from_date" not in data or "to_date" not in data:
+            raise serializers.ValidationError("Either stays or from_date and to_date are required.")
+
+        return QuoteStaySerializer().validate(data)
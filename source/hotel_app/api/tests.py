@@ -1,12 +1,20 @@
 from django.test import TestCase
 from django.urls import reverse, resolve
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.test import APIClient
-from ..models import Room, Booking
+from ..models import Room, Booking, RateRule
+from ..pricing import get_pricing_rules, invalidate_pricing_rules
+from ..testing import create_bookings
+from .. import cache as room_cache
 from .serializers import RoomSerializer, BookingSerializer
 from .views import RootAPIView, RoomViewSet, BookingViewSet
+from .pagination import BookingPagination
 from datetime import date, timedelta
+from unittest.mock import patch
+import base64
+import json
 
 # Create your tests here.
 
@@ -39,6 +47,7 @@ class RoomAPITests(TestCase):
     def setUp(self):
 
         self.client = APIClient()
+        cache.clear() # room responses are cached
 
     @staticmethod
     def create_rooms():
@@ -68,7 +77,36 @@ class RoomAPITests(TestCase):
         rooms = Room.objects.all()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.json(), RoomSerializer(rooms, many=True).data)
+        self.assertEqual(response.json()["results"], RoomSerializer(rooms, many=True).data)
+
+    def test_list_rooms_is_paginated_with_a_cursor(self):
+
+        self.create_rooms()
+
+        response = self.client.get(reverse('room-list'), data={"page_size": 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.json()) # no COUNT(*) query
+        self.assertEqual(response.json()["results"], RoomSerializer(Room.objects.order_by("id")[:4], many=True).data)
+
+        response = self.client.get(response.json()["next"]) # follow the cursor
+
+        self.assertEqual(response.json()["results"], RoomSerializer(Room.objects.order_by("id")[4:8], many=True).data)
+
+    def test_pages_of_rooms_ordered_by_a_non_unique_field(self):
+
+        self.create_rooms() # all at the same price
+
+        rooms = []
+        response = self.client.get(reverse('room-list'), data={"page_size": 3, "ordering": "-price"})
+        while True:
+            rooms.extend(room["number"] for room in response.json()["results"])
+            if response.json()["next"] is None:
+                break
+            response = self.client.get(response.json()["next"])
+
+        # the ties are broken by id
+        self.assertEqual(rooms, list(Room.objects.order_by("id").values_list("number", flat=True)))
 
     def test_get_room_by_id(self):
 
@@ -115,38 +153,237 @@ class RoomAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Room.objects.all().count(), 0)
 
+    def test_room_list_and_detail_are_cached(self):
+
+        self.create_rooms()
+
+        self.client.get(reverse('room-list'))
+        self.client.get(reverse("room-detail", kwargs={"pk": 1}))
+
+        with self.assertNumQueries(1): # only the ETag query of the room detail
+            list_response = self.client.get(reverse('room-list'))
+            detail_response = self.client.get(reverse("room-detail", kwargs={"pk": 1}))
+
+        self.assertEqual(list_response.json()["results"], RoomSerializer(Room.objects.all(), many=True).data)
+        self.assertEqual(detail_response.json(), RoomSerializer(Room.objects.get(pk=1)).data)
+
+    def test_room_cache_is_invalidated_when_a_room_changes(self):
+
+        room = Room.objects.create(number="Room 1", size=25, price=100)
+        self.client.get(reverse('room-list'))
+        self.client.get(reverse("room-detail", kwargs={"pk": room.pk}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.price = 150
+            room.save()
+
+        self.assertEqual(self.client.get(reverse('room-list')).json()["results"][0]["price"], 150)
+        self.assertEqual(self.client.get(reverse("room-detail", kwargs={"pk": room.pk})).json()["price"], 150)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.delete()
+
+        self.assertEqual(self.client.get(reverse('room-list')).json()["results"], [])
+        self.assertEqual(self.client.get(reverse("room-detail", kwargs={"pk": 1})).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_room_detail_read_before_a_change_is_not_kept(self):
+
+        room = Room.objects.create(number="Room 1", size=25, price=100)
+
+        def read_room_then_change_it():
+            data = RoomSerializer(Room.objects.get(pk=room.pk)).data
+            with self.captureOnCommitCallbacks(execute=True): # committed before the response is cached
+                Room.objects.filter(pk=room.pk).update(price=150)
+            return data
+
+        self.assertEqual(room_cache.get_room_detail(room.pk, read_room_then_change_it)["price"], 100)
+
+        self.assertEqual(self.client.get(reverse("room-detail", kwargs={"pk": room.pk})).json()["price"], 150)
+
+    def test_room_cache_is_invalidated_by_bulk_operations(self):
+
+        self.client.get(reverse('room-list'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_rooms()
+
+        self.assertEqual(len(self.client.get(reverse('room-list')).json()["results"]), 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.filter(pk=1).update(price=150)
+
+        self.assertEqual(self.client.get(reverse("room-detail", kwargs={"pk": 1})).json()["price"], 150)
+
+    def test_room_cache_stats(self):
+
+        staff_user = User.objects.create(email="staff@example.com", password="testpassword", is_staff=True)
+
+        # only staff can read the stats
+        self.assertEqual(self.client.get(reverse("room-cache-stats")).status_code, status.HTTP_403_FORBIDDEN)
+
+        Room.objects.create(number="Room 1", size=25, price=100)
+        self.client.get(reverse("room-detail", kwargs={"pk": 1})) # miss
+        self.client.get(reverse("room-detail", kwargs={"pk": 1})) # hit
+
+        self.client.force_authenticate(user=staff_user)
+        response = self.client.get(reverse("room-cache-stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"hits": 1, "misses": 1})
+
+    def test_get_room_with_matching_etag_returns_304(self):
+
+        room = Room.objects.create(number="Room 1", size=25, price=100)
+
+        response = self.client.get(reverse("room-detail", kwargs={"pk": room.pk}))
+        etag = response["ETag"]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("room-detail", kwargs={"pk": room.pk}), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        room.price = 150
+        room.save()
+
+        response = self.client.get(reverse("room-detail", kwargs={"pk": room.pk}), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_rooms_with_matching_etag_returns_304(self):
+
+        self.create_rooms()
+        etag = self.client.get(reverse('room-list'))["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('room-list'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # another page has another ETag
+        self.assertNotEqual(self.client.get(reverse('room-list'), data={"page_size": 2})["ETag"], etag)
+
+    def test_filter_rooms_by_size_and_price(self):
+
+        Room.objects.create(number="Room 1", size=20, price=80)
+        Room.objects.create(number="Room 2", size=30, price=120)
+        Room.objects.create(number="Room 3", size=40, price=200)
+
+        response = self.client.get(reverse("room-list"), data={"size_min": 25, "price_max": 150})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([room["number"] for room in response.json()["results"]], ["Room 2"])
+
+    def test_order_rooms_by_price(self):
+
+        Room.objects.create(number="Room 1", size=20, price=120)
+        Room.objects.create(number="Room 2", size=30, price=80)
+
+        response = self.client.get(reverse("room-list"), data={"ordering": "-price"})
+
+        self.assertEqual([room["price"] for room in response.json()["results"]], [120, 80])
+
+    def test_cant_filter_rooms_with_invalid_values(self):
+
+        response = self.client.get(reverse("room-list"), data={"size_min": "big"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_available_rooms_is_resolved_to_RoomViewSet(self):
+
+        view = resolve(reverse("room-available"))
+
+        self.assertEqual(view.func.__name__, RoomViewSet.__name__)
+
+    def test_list_available_rooms(self):
+
+        user = User.objects.create(email="testuser@example.com", password="testpassword")
+        booked_room = Room.objects.create(number="Room 1", size=25, price=100)
+        free_room = Room.objects.create(number="Room 2", size=25, price=100)
+        Booking.bookings.create(customer=user, room=booked_room, from_date=date(2025,12,1), to_date=date(2025,12,11))
+
+        response = self.client.get(reverse("room-available"), data={"from_date": "2025-12-05", "to_date": "2025-12-15"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], RoomSerializer([free_room], many=True).data)
+
+    def test_room_is_available_on_the_day_a_booking_ends(self):
+
+        user = User.objects.create(email="testuser@example.com", password="testpassword")
+        room = Room.objects.create(number="Room 1", size=25, price=100)
+        Booking.bookings.create(customer=user, room=room, from_date=date(2025,12,1), to_date=date(2025,12,11))
+
+        response = self.client.get(reverse("room-available"), data={"from_date": "2025-12-11", "to_date": "2025-12-15"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], RoomSerializer([room], many=True).data)
+
+    def test_cant_search_available_rooms_with_invalid_dates(self):
+
+        # to_date is less than from_date
+        response = self.client.get(reverse("room-available"), data={"from_date": "2025-12-15", "to_date": "2025-12-01"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # dates are missing
+        response = self.client.get(reverse("room-available"))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_rooms_calendar(self):
+
+        user = User.objects.create(email="testuser@example.com", password="testpassword")
+        booked_room = Room.objects.create(number="Room 1", size=25, price=100)
+        free_room = Room.objects.create(number="Room 2", size=25, price=100)
+        booking = Booking.bookings.create(customer=user, room=booked_room, from_date=date(2025,12,1),
+                                          to_date=date(2025,12,11))
+        window = {"from_date": "2025-11-28", "to_date": "2026-01-03"} # 36 nights over 3 months
+
+        response = self.client.get(reverse("room-calendar"), data=window)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # the 10 booked nights start with the 4th night of the window
+        booked = (((1 << 10) - 1) << 3).to_bytes(5, "little")
+        self.assertEqual(response.json()["results"], [
+            {"room": booked_room.id, "booked": base64.b64encode(booked).decode()},
+            {"room": free_room.id, "booked": base64.b64encode(bytes(5)).decode()},
+        ])
+
+        with self.assertNumQueries(1): # the months are cached, only the rooms are read
+            self.client.get(reverse("room-calendar"), data=window)
+
+        # moving the booking drops the cached months of both stays
+        booking.update_booking(from_date=date(2025,12,30), to_date=date(2026,1,2), room=free_room)
+
+        response = self.client.get(reverse("room-calendar"), data=window)
+
+        self.assertEqual([base64.b64decode(room["booked"]) for room in response.json()["results"]],
+                         [bytes(5), (((1 << 3) - 1) << 32).to_bytes(5, "little")])
+
+    def test_cant_get_a_calendar_with_invalid_dates(self):
+
+        for window in [{"from_date": "2025-12-15", "to_date": "2025-12-01"},
+                       {"from_date": "2025-01-01", "to_date": "2028-01-01"}]: # too long
+            response = self.client.get(reverse("room-calendar"), data=window)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class BookingAPITests(TestCase):
 
     def setUp(self):
 
         self.client = APIClient()
+        cache.clear() # throttling counters
 
-    @staticmethod
-    def create_bookings():
-
-        rooms = []
-        users = []
-        for i in range(1, 11): # create rooms and users
-            rooms.append(Room(number=f"Room {i}", size=25, price=100))
-            users.append(User(email=f"testuser{i}@example.com", password="testpassword"))
-
-        Room.objects.bulk_create(rooms)
-        User.objects.bulk_create(users)
-
-        bookings = []
-        for i in range(len(rooms)): # create bookings
-            from_date = date(2025,12,1)
-            to_date = date(2025,12,11)
-            bookings.append(
-                Booking.create_booking(
-                    customer=users[i],
-                    room=rooms[i],
-                    from_date=from_date,
-                    to_date=to_date,
-                ))
-
-        Booking.bookings.bulk_create(bookings)
+    create_bookings = staticmethod(create_bookings)
 
     @staticmethod
     def create_a_booking():
@@ -182,6 +419,91 @@ class BookingAPITests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(Booking.bookings.all().count(), 10)
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_list_bookings_is_ordered_by_from_date_and_id(self):
+
+        self.create_bookings()
+        Booking.bookings.filter(pk__in=[2, 5]).update(from_date=date(2025,11,1))
+
+        response = self.client.get(reverse('booking-list'), data={"page_size": 3})
+
+        expected_bookings = Booking.bookings.order_by("from_date", "id")[:3]
+        self.assertEqual(response.json()["results"], BookingSerializer(expected_bookings, many=True).data)
+        self.assertEqual([booking.id for booking in expected_bookings], [2, 5, 1])
+
+    def test_filter_bookings_by_customer_and_room(self):
+
+        self.create_bookings()
+
+        response = self.client.get(reverse('booking-list'), data={"customer": 3})
+
+        self.assertEqual(response.json()["results"], BookingSerializer([Booking.bookings.get(pk=3)], many=True).data)
+
+        response = self.client.get(reverse('booking-list'), data={"room": 4})
+
+        self.assertEqual(response.json()["results"], BookingSerializer([Booking.bookings.get(pk=4)], many=True).data)
+
+    def test_filter_bookings_overlapping_a_date_range(self):
+
+        self.create_bookings()
+        Booking.bookings.filter(pk__in=[1, 2]).update(from_date=date(2026,1,1), to_date=date(2026,1,5))
+
+        response = self.client.get(reverse('booking-list'),
+                                   data={"overlaps_from": "2026-01-04", "overlaps_to": "2026-01-10"})
+
+        self.assertEqual([booking["customer"] for booking in response.json()["results"]], [1, 2])
+
+        # the stay ends the day the range starts, no overlap
+        response = self.client.get(reverse('booking-list'), data={"overlaps_from": "2026-01-05"})
+
+        self.assertEqual(response.json()["results"], [])
+
+    def test_filter_bookings_by_price_and_order_them(self):
+
+        self.create_bookings()
+        Booking.bookings.filter(pk=1).update(price=500)
+        Booking.bookings.filter(pk=2).update(price=700)
+
+        response = self.client.get(reverse('booking-list'), data={"price_max": 800, "ordering": "-price"})
+
+        self.assertEqual([booking["price"] for booking in response.json()["results"]], [700, 500])
+
+    def test_pages_of_bookings_sharing_a_from_date(self):
+
+        user = User.objects.create(email="testuser@example.com", password="testpassword")
+        Booking.bookings.bulk_create(
+            Booking(customer=user, room=room, from_date=date(2025,12,1) + timedelta(days=i // 2000),
+                    to_date=date(2025,12,11), price=1000)
+            for i, room in enumerate(Room.objects.bulk_create(Room(number=f"Room {i}", size=25, price=100)
+                                                              for i in range(2100)))
+        )
+
+        # more than the 1000 rows sharing the first ordering field CursorPagination can skip with an OFFSET
+        rooms = [] # every booking has its own room
+        response = self.client.get(reverse("booking-list"), data={"page_size": 500})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            rooms.extend(booking["room"] for booking in response.json()["results"])
+            if response.json()["next"] is None:
+                break
+            response = self.client.get(response.json()["next"])
+
+        self.assertEqual(rooms, list(Booking.bookings.order_by("from_date", "id").values_list("room_id", flat=True)))
+
+        # and back from the last page
+        previous = self.client.get(response.json()["previous"])
+        self.assertEqual([booking["room"] for booking in previous.json()["results"]], rooms[1500:2000])
+
+    @patch.object(BookingPagination, "max_page_size", 5)
+    def test_page_size_is_limited(self):
+
+        self.create_bookings()
+
+        response = self.client.get(reverse('booking-list'), data={"page_size": 1000})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 5)
 
     def test_get_booking_by_id(self):
 
@@ -192,6 +514,63 @@ class BookingAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json(), BookingSerializer(Booking.bookings.get(pk=1)).data)
 
+    def test_get_booking_with_matching_etag_returns_304(self):
+
+        self.create_a_booking()
+
+        response = self.client.get(reverse("booking-detail", kwargs={"pk": 1}))
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("booking-detail", kwargs={"pk": 1}), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse("booking-detail", kwargs={"pk": 1}),
+                                   HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_booking_etag_changes_when_booking_is_updated(self):
+
+        self.create_a_booking()
+        etag = self.client.get(reverse("booking-detail", kwargs={"pk": 1}))["ETag"]
+
+        Booking.bookings.first().update_booking(to_date=date(2025,12,15))
+
+        response = self.client.get(reverse("booking-detail", kwargs={"pk": 1}), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_bookings_etag_changes_when_a_booking_is_deleted(self):
+
+        self.create_bookings()
+        etag = self.client.get(reverse('booking-list'))["ETag"]
+
+        with self.assertNumQueries(1): # only the page, no query over the whole collection
+            self.assertEqual(self.client.get(reverse('booking-list'), HTTP_IF_NONE_MATCH=etag).status_code,
+                             status.HTTP_304_NOT_MODIFIED)
+
+        Booking.bookings.filter(pk=1).delete()
+
+        self.assertEqual(self.client.get(reverse('booking-list'), HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_200_OK)
+
+    def test_list_bookings_etag_changes_when_the_list_grows_past_the_page(self):
+
+        self.create_bookings()
+        url = f"{reverse('booking-list')}?page_size=10"
+        etag = self.client.get(url)["ETag"]
+
+        room = Room.objects.get(pk=1)
+        Booking.create_booking(customer=User.objects.get(pk=1), room=room,
+                               from_date=date(2026,1,1), to_date=date(2026,1,3)).save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag) # same rows on the page, but a page follows it
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.json()["next"])
+
     def test_create_booking(self):
 
         customer = User.objects.create(email="testuser@example.com", password="testpassword")
@@ -212,6 +591,106 @@ class BookingAPITests(TestCase):
         expected_price = 1000
         self.assertEqual(response.json()["price"], expected_price)
 
+    def test_cant_create_overlapping_booking(self):
+
+        self.create_a_booking()
+
+        payload = {
+            "customer": User.objects.first().id,
+            "room": Room.objects.first().id,
+            "from_date": date(2025,12,5),
+            "to_date": date(2025,12,15),
+        }
+        response = self.client.post(reverse("booking-list"), data=payload)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Booking.bookings.count(), 1)
+
+    def test_bulk_create_bookings(self):
+
+        customer = User.objects.create(email="testuser@example.com", password="testpassword")
+        rooms = [Room.objects.create(number=f"Room {i}", size=25, price=100) for i in range(1, 4)]
+
+        payload = [
+            {"customer": customer.id, "room": room.id, "from_date": "2025-12-01", "to_date": "2025-12-11"}
+            for room in rooms
+        ]
+        payload.append({"customer": customer.id, "room": rooms[0].id, "from_date": "2025-12-11", "to_date": "2025-12-13"})
+
+        get_pricing_rules() # loaded once per process (and when they change)
+
+        # customers, rooms, overlapping bookings, bookings and nights inserts (plus savepoint and release)
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse("booking-bulk"), data=payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.bookings.count(), 4)
+        self.assertEqual([booking["price"] for booking in response.json()], [1000, 1000, 1000, 200])
+
+    def test_bulk_create_bookings_reports_errors_per_booking(self):
+
+        self.create_a_booking()
+        customer = User.objects.first()
+        room = Room.objects.first()
+
+        payload = [
+            {"customer": customer.id, "room": room.id, "from_date": "2025-12-20", "to_date": "2025-12-22"}, # ok
+            {"customer": customer.id, "room": room.id, "from_date": "2025-12-05", "to_date": "2025-12-08"}, # overlap
+            {"customer": customer.id, "room": room.id, "from_date": "2025-12-21", "to_date": "2025-12-25"}, # overlap
+            {"customer": 999, "room": 999, "from_date": "2025-12-20", "to_date": "2025-12-22"}, # wrong ids
+        ]
+        response = self.client.post(reverse("booking-bulk"), data=payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn("non_field_errors", errors[1])
+        self.assertIn("non_field_errors", errors[2])
+        self.assertEqual(set(errors[3]), {"customer", "room"})
+        self.assertEqual(Booking.bookings.count(), 1) # nothing is created
+
+    def test_cant_bulk_create_bookings_with_invalid_dates(self):
+
+        payload = [{"customer": 1, "room": 1, "from_date": "2025-12-11", "to_date": "2025-12-01"}]
+        response = self.client.post(reverse("booking-bulk"), data=payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.json()[0])
+
+    def test_export_bookings_as_ndjson(self):
+
+        self.create_bookings()
+
+        response = self.client.get(reverse("booking-export"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 10)
+        self.assertEqual(
+            json.loads(lines[0]),
+            {"id": 1, "customer": 1, "room": 1, "from_date": "2025-12-01", "to_date": "2025-12-11", "price": 1000}
+        )
+
+    def test_export_bookings_as_csv(self):
+
+        self.create_bookings()
+
+        response = self.client.get(reverse("booking-export"), data={"export_format": "csv"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,customer,room,from_date,to_date,price")
+        self.assertEqual(lines[1], "1,1,1,2025-12-01,2025-12-11,1000")
+        self.assertEqual(len(lines), 11)
+
+    def test_cant_export_bookings_in_unknown_format(self):
+
+        response = self.client.get(reverse("booking-export"), data={"export_format": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_update_booking(self):
 
         self.create_a_booking()
@@ -261,3 +740,337 @@ class BookingAPITests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Booking.bookings.all().count(), 0)
+
+
+class IdempotencyTests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+        cache.clear()
+        self.customer = User.objects.create(email="testuser@example.com", password="testpassword")
+        self.room = Room.objects.create(number="Room 1", size=25, price=100)
+        self.payload = {"customer": self.customer.id, "room": self.room.id, "from_date": "2025-12-01",
+                        "to_date": "2025-12-11"}
+
+    def test_retried_creation_is_replayed(self):
+
+        response = self.client.post(reverse("booking-list"), data=self.payload, HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0): # the booking tables aren't touched
+            retry = self.client.post(reverse("booking-list"), data=self.payload, HTTP_IDEMPOTENCY_KEY="key-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), response.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.bookings.count(), 1)
+
+    def test_requests_without_key_run_again(self):
+
+        self.client.post(reverse("booking-list"), data=self.payload)
+        response = self.client.post(reverse("booking-list"), data=self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_key_reused_for_another_request(self):
+
+        self.client.post(reverse("booking-list"), data=self.payload, HTTP_IDEMPOTENCY_KEY="key-1")
+
+        response = self.client.post(reverse("booking-list"), data={**self.payload, "to_date": "2025-12-12"},
+                                    HTTP_IDEMPOTENCY_KEY="key-1")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Booking.bookings.count(), 1)
+
+    def test_request_in_progress(self):
+
+        with patch.object(BookingViewSet, "_update_booking", autospec=True) as update_booking:
+            def retry(view, request):
+                # the client retries before the first request answers
+                return self.client.patch(reverse("booking-detail", kwargs={"pk": booking.pk}),
+                                         data={"to_date": "2025-12-12"}, HTTP_IDEMPOTENCY_KEY="key-2")
+            update_booking.side_effect = retry
+
+            self.client.post(reverse("booking-list"), data=self.payload)
+            booking = Booking.bookings.get()
+            response = self.client.patch(reverse("booking-detail", kwargs={"pk": booking.pk}),
+                                         data={"to_date": "2025-12-12"}, HTTP_IDEMPOTENCY_KEY="key-2")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json(), {"detail": "A request with this Idempotency-Key is in progress."})
+
+    def test_failed_requests_dont_keep_the_key(self):
+
+        Booking.bookings.create(customer=self.customer, room=self.room, from_date=date(2025,12,5),
+                                to_date=date(2025,12,7))
+
+        response = self.client.post(reverse("booking-list"), data=self.payload, HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        Booking.bookings.all().delete()
+
+        response = self.client.post(reverse("booking-list"), data=self.payload, HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_retried_update_is_replayed(self):
+
+        self.client.post(reverse("booking-list"), data=self.payload)
+        booking = Booking.bookings.get()
+        url = reverse("booking-detail", kwargs={"pk": booking.pk})
+
+        self.client.patch(url, data={"to_date": "2025-12-12"}, HTTP_IDEMPOTENCY_KEY="key-3")
+        Booking.bookings.filter(pk=booking.pk).update(to_date=date(2025,12,20)) # changed by someone else
+
+        response = self.client.patch(url, data={"to_date": "2025-12-12"}, HTTP_IDEMPOTENCY_KEY="key-3")
+
+        self.assertEqual(response.json()["to_date"], "2025-12-12")
+        self.assertEqual(Booking.bookings.get(pk=booking.pk).to_date, date(2025,12,20)) # not updated again
+
+    def test_keys_are_scoped_to_users(self):
+
+        self.client.force_authenticate(user=self.customer)
+        self.client.post(reverse("booking-list"), data=self.payload, HTTP_IDEMPOTENCY_KEY="key-1")
+
+        other_user = User.objects.create(email="other@example.com", password="testpassword")
+        self.client.force_authenticate(user=other_user)
+        response = self.client.post(reverse("booking-list"), data=self.payload, HTTP_IDEMPOTENCY_KEY="key-1")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT) # ran: the room is taken
+        self.assertNotIn("Idempotent-Replayed", response)
+
+
+class QuoteAPITests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+        cache.clear()
+        self.customer = User.objects.create(email="testuser@example.com", password="testpassword")
+        self.room = Room.objects.create(number="Room 1", size=25, price=100)
+        self.large_room = Room.objects.create(number="Room 2", size=40, price=200)
+        Booking.bookings.create(customer=self.customer, room=self.room, from_date=date(2025,12,5),
+                                to_date=date(2025,12,8))
+        self.addCleanup(invalidate_pricing_rules)
+
+    def stay(self, room_id, from_date, to_date):
+
+        return {"room": room_id, "from_date": from_date, "to_date": to_date}
+
+    def test_quote_stays(self):
+
+        get_pricing_rules() # loaded once per process
+
+        stays = [self.stay(self.room.id, "2025-12-01", "2025-12-06"), self.stay(self.room.id, "2025-12-08", "2025-12-10"),
+                 self.stay(self.large_room.id, "2025-12-01", "2025-12-11"), self.stay(999, "2025-12-01", "2025-12-02")]
+
+        with self.assertNumQueries(1): # the rooms and their bookings are read together
+            response = self.client.post(reverse("quote-list"), data={"stays": stays}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [
+            {**stays[0], "available": False, "price": 500},
+            {**stays[1], "available": True, "price": 200}, # starts the day the booking ends
+            {**stays[2], "available": True, "price": 2000},
+            {**stays[3], "available": False, "price": None}, # unknown room
+        ])
+
+    def test_quotes_apply_the_pricing_rules(self):
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RateRule.objects.create(name="December", from_date=date(2025,12,1), to_date=date(2026,1,1), percent=150)
+
+        response = self.client.post(reverse("quote-list"), format="json",
+                                    data={"stays": [self.stay(self.large_room.id, "2025-11-29", "2025-12-02")]})
+
+        # 2 nights at 200 and 1 night at 300
+        self.assertEqual(response.json()["results"][0]["price"], 700)
+
+    def test_quote_filtered_rooms(self):
+
+        get_pricing_rules()
+
+        with self.assertNumQueries(2): # a page of rooms, then their bookings
+            response = self.client.post(reverse("quote-list"), format="json",
+                                        data={"from_date": "2025-12-01", "to_date": "2025-12-06"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(quote["room"], quote["available"], quote["price"]) for quote in response.json()["results"]],
+                         [(self.room.id, False, 500), (self.large_room.id, True, 1000)])
+
+        # the rooms are quoted a page at a time
+        response = self.client.post(f"{reverse('quote-list')}?page_size=1", format="json",
+                                    data={"from_date": "2025-12-01", "to_date": "2025-12-06"})
+        self.assertEqual([quote["room"] for quote in response.json()["results"]], [self.room.id])
+
+        response = self.client.post(response.json()["next"], format="json",
+                                    data={"from_date": "2025-12-01", "to_date": "2025-12-06"})
+        self.assertEqual([quote["room"] for quote in response.json()["results"]], [self.large_room.id])
+
+        response = self.client.post(reverse("quote-list"), format="json",
+                                    data={"from_date": "2025-12-01", "to_date": "2025-12-06", "filters": {"size_min": 30}})
+
+        self.assertEqual([quote["room"] for quote in response.json()["results"]], [self.large_room.id])
+
+    def test_invalid_quotes(self):
+
+        for data in [{}, {"from_date": "2025-12-06", "to_date": "2025-12-01"},
+                     {"stays": [self.stay(self.room.id, "2025-12-06", "2025-12-01")]},
+                     {"from_date": "2025-12-01", "to_date": "2025-12-06", "filters": {"size_min": "large"}},
+                     # too long
+                     {"stays": [self.stay(self.room.id, "0001-01-01", "9999-12-31")]},
+                     {"from_date": "2025-01-01", "to_date": "2026-01-03"}]:
+            with self.subTest(data=data):
+                response = self.client.post(reverse("quote-list"), data=data, format="json")
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReportAPITests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+        staff_user = User.objects.create(email="staff@example.com", password="testpassword", is_staff=True)
+        self.client.force_authenticate(user=staff_user)
+
+        self.customers = [User.objects.create(email=f"testuser{i}@example.com", password="testpassword")
+                          for i in range(1, 3)]
+        self.rooms = [Room.objects.create(number=f"Room {i}", size=25, price=100) for i in range(1, 4)]
+
+        # 6 nights in november and 4 in december
+        Booking.bookings.create(customer=self.customers[0], room=self.rooms[0], from_date=date(2025,11,25),
+                                to_date=date(2025,12,5))
+        Booking.bookings.create(customer=self.customers[1], room=self.rooms[1], from_date=date(2025,12,10),
+                                to_date=date(2025,12,12))
+
+    def test_reports_are_only_for_staff(self):
+
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(reverse("report-revenue"), data={"from_date": "2025-11-01", "to_date": "2026-01-01"})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_revenue_by_month_is_prorated(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("report-revenue"),
+                                       data={"from_date": "2025-11-01", "to_date": "2026-01-01", "group_by": "month"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [
+            {"month": "2025-11", "nights": 6, "revenue": 600.0},
+            {"month": "2025-12", "nights": 6, "revenue": 600.0},
+        ])
+
+    def test_revenue_by_room_is_clipped_to_the_window(self):
+
+        response = self.client.get(reverse("report-revenue"),
+                                   data={"from_date": "2025-12-01", "to_date": "2026-01-01", "group_by": "room"})
+
+        self.assertEqual(response.json()["results"], [
+            {"room": self.rooms[0].id, "nights": 4, "revenue": 400.0},
+            {"room": self.rooms[1].id, "nights": 2, "revenue": 200.0},
+        ])
+
+    def test_revenue_by_customer_and_month(self):
+
+        response = self.client.get(reverse("report-revenue"),
+                                   data={"from_date": "2025-11-01", "to_date": "2026-01-01",
+                                         "group_by": "customer,month"})
+
+        self.assertEqual(response.json()["results"], [
+            {"customer": self.customers[0].id, "month": "2025-11", "nights": 6, "revenue": 600.0},
+            {"customer": self.customers[0].id, "month": "2025-12", "nights": 4, "revenue": 400.0},
+            {"customer": self.customers[1].id, "month": "2025-12", "nights": 2, "revenue": 200.0},
+        ])
+
+    def test_cant_group_revenue_by_unknown_field(self):
+
+        response = self.client.get(reverse("report-revenue"),
+                                   data={"from_date": "2025-11-01", "to_date": "2026-01-01", "group_by": "price"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_occupancy(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("report-occupancy"),
+                                       data={"from_date": "2025-12-01", "to_date": "2025-12-11"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "nights": 10,
+            "occupancy": round(5 / 30, 4),
+            "results": [
+                {"room": self.rooms[0].id, "nights": 4, "occupancy": 0.4},
+                {"room": self.rooms[1].id, "nights": 1, "occupancy": 0.1},
+                {"room": self.rooms[2].id, "nights": 0, "occupancy": 0.0},
+            ],
+        })
+
+
+class AsyncAPITests(TestCase):
+
+    def setUp(self):
+
+        create_bookings()
+
+    async def test_async_list_rooms(self):
+
+        response = await self.async_client.get(reverse("async-room-list"), {"page_size": 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rooms = [room async for room in Room.objects.order_by("id")]
+        self.assertEqual(response.json()["results"], RoomSerializer(rooms[:4], many=True).data)
+
+        response = await self.async_client.get(response.json()["next"])
+
+        self.assertEqual(response.json()["results"], RoomSerializer(rooms[4:8], many=True).data)
+
+    async def test_async_get_room_by_id(self):
+
+        response = await self.async_client.get(reverse("async-room-detail", kwargs={"pk": 1}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), RoomSerializer(await Room.objects.aget(pk=1)).data)
+
+        response = await self.async_client.get(reverse("async-room-detail", kwargs={"pk": 999}))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_list_available_rooms(self):
+
+        room = await Room.objects.acreate(number="Room 11", size=25, price=100)
+
+        response = await self.async_client.get(reverse("async-room-available"),
+                                               {"from_date": "2025-12-05", "to_date": "2025-12-08"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], RoomSerializer([room], many=True).data)
+
+        response = await self.async_client.get(reverse("async-room-available"), {"from_date": "2025-12-05"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_list_bookings(self):
+
+        await Booking.bookings.filter(pk=5).aupdate(from_date=date(2025,11,1))
+
+        response = await self.async_client.get(reverse("async-booking-list"), {"page_size": 3})
+
+        bookings = [booking async for booking in Booking.bookings.order_by("from_date", "id")]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], BookingSerializer(bookings[:3], many=True).data)
+
+        response = await self.async_client.get(response.json()["next"])
+
+        self.assertEqual(response.json()["results"], BookingSerializer(bookings[3:6], many=True).data)
+
+    async def test_async_get_booking_by_id(self):
+
+        response = await self.async_client.get(reverse("async-booking-detail", kwargs={"pk": 1}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), BookingSerializer(await Booking.bookings.aget(pk=1)).data)
@@ -1,12 +1,21 @@
 from django.urls import path, include
-from .views import RootAPIView, RoomViewSet, BookingViewSet
+from . import async_views
+from .views import RootAPIView, RoomViewSet, BookingViewSet, QuoteViewSet, ReportViewSet
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r"rooms", RoomViewSet, basename="room")
 router.register(r"bookings", BookingViewSet, basename="booking")
+router.register(r"quotes", QuoteViewSet, basename="quote")
+router.register(r"reports", ReportViewSet, basename="report")
 
 urlpatterns = [
     path("", RootAPIView.as_view(), name="api-root"),
+    # async (ASGI) read endpoints
+    path("async/rooms/", async_views.room_list, name="async-room-list"),
+    path("async/rooms/available/", async_views.room_available, name="async-room-available"),
+    path("async/rooms/<int:pk>/", async_views.room_detail, name="async-room-detail"),
+    path("async/bookings/", async_views.booking_list, name="async-booking-list"),
+    path("async/bookings/<int:pk>/", async_views.booking_detail, name="async-booking-detail"),
     path("", include(router.urls))
 ]
\ No newline at end of file
@@ -1,8 +1,23 @@
+from django.http import StreamingHttpResponse
+from project_config.throttling import BurstRateThrottle, SustainedRateThrottle
 from rest_framework.views import APIView
-from rest_framework import viewsets, status
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets, status, permissions, filters
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from ..models import Room, Booking
-from .serializers import RoomSerializer, BookingSerializer, CreateBookingSerializer, UpdateBookingSerializer
+from .pagination import RoomPagination, BookingPagination
+from .export import bookings_to_ndjson, bookings_to_csv
+from .conditional import ConditionalGetMixin
+from .idempotency import idempotent
+from .filters import RoomFilter, BookingFilter
+from .. import cache as room_cache
+from ..reports import revenue_report, occupancy_report
+from ..quotes import quote_stays, quote_rooms
+from ..calendars import get_calendars, encode_calendar
+from ..models import Room, Booking, RoomNotAvailableError, BookingsNotCreatedError
+from .serializers import (RoomSerializer, RoomAvailabilitySerializer, RoomCalendarSerializer, BookingSerializer,
+                          CreateBookingSerializer, UpdateBookingSerializer, BulkBookingSerializer,
+                          RevenueReportSerializer, QuoteSerializer)
 
 
 # Create your views here.
@@ -14,17 +29,104 @@ class RootAPIView(APIView):
         return Response({"message": "Hello, World!"})
 
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
 
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
+    throttle_classes = [BurstRateThrottle, SustainedRateThrottle]
+    pagination_class = RoomPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = RoomFilter
+    ordering_fields = ["id", "size", "price"]
 
+    def list(self, request, *args, **kwargs):
 
-class BookingViewSet(viewsets.ModelViewSet):
+        # the 304 check runs first, then the response data comes from the room cache
+        list_rooms = super(ConditionalGetMixin, self).list
+
+        return self.conditional_response(
+            self.get_collection_validators(),
+            lambda: Response(room_cache.get_room_list(request.build_absolute_uri(),
+                                                      lambda: list_rooms(request, *args, **kwargs).data))
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+
+        if not self.kwargs["pk"].isdigit(): # not a valid room id, nothing to cache
+            return super().retrieve(request, *args, **kwargs)
+
+        retrieve_room = super(ConditionalGetMixin, self).retrieve
+
+        return self.conditional_response(
+            self.get_object_validators(),
+            lambda: Response(room_cache.get_room_detail(int(self.kwargs["pk"]),
+                                                        lambda: retrieve_room(request, *args, **kwargs).data))
+        )
+
+    def get_collection_validators(self):
+
+        # the catalog version changes whenever any room changes, so no query is needed
+        return self.collection_etag(str(room_cache.catalog_version())), None
+
+    @action(detail=False, methods=["get"], url_path="cache-stats", permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """
+        Hit and miss counters of the room cache (staff only).
+        """
+
+        return Response(room_cache.cache_stats())
+
+    @action(detail=False, methods=["get"])
+    def available(self, request):
+        """
+        Rooms that are free for the whole stay: GET /rooms/available/?from_date=YYYY-MM-DD&to_date=YYYY-MM-DD
+        """
+
+        query_serializer = RoomAvailabilitySerializer(data=request.query_params)
+
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rooms = self.paginate_queryset(
+            self.filter_queryset(self.get_queryset()).available(**query_serializer.validated_data)
+        )
+
+        return self.get_paginated_response(RoomSerializer(rooms, many=True).data)
+
+
+    @action(detail=False, methods=["get"])
+    def calendar(self, request):
+        """
+        Booked nights of the rooms: GET /rooms/calendar/?from_date=YYYY-MM-DD&to_date=YYYY-MM-DD (and the filters of
+        the list), as a base64 bitmap per room where bit i % 8 (least significant first) of byte i // 8 is set when
+        the i-th night from from_date is booked.
+        """
+
+        query_serializer = RoomCalendarSerializer(data=request.query_params)
+
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rooms = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        calendars = get_calendars([room.pk for room in rooms], **query_serializer.validated_data)
+
+        return self.get_paginated_response([
+            {"room": room_id, "booked": encode_calendar(bitmap)} for room_id, bitmap in calendars.items()
+        ])
+
+
+class BookingViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
 
     queryset = Booking.bookings.all()
     serializer_class = BookingSerializer
+    throttle_classes = [BurstRateThrottle, SustainedRateThrottle]
+    pagination_class = BookingPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = BookingFilter
+    ordering_fields = ["id", "from_date", "to_date", "price"]
     response_serializer = BookingSerializer # serializer used in all responses
+    bulk_max_bookings = 10000 # max number of bookings per bulk request
+    export_chunk_size = 2000 # rows fetched from the database at a time by the export action
 
     def get_serializer_class(self):
         """
@@ -37,24 +139,80 @@ class BookingViewSet(viewsets.ModelViewSet):
             return CreateBookingSerializer
         elif self.action == "update" or self.action == "partial_update":
             return UpdateBookingSerializer
+        elif self.action == "bulk":
+            return BulkBookingSerializer
 
         return self.serializer_class
 
+    @idempotent
     def create(self, request, *args, **kwargs):
 
         serializer = self.get_serializer(data=request.data)
 
         if serializer.is_valid():
-            booking = serializer.create(serializer.validated_data)
+            try:
+                booking = serializer.create(serializer.validated_data)
+            except RoomNotAvailableError as error:
+                return Response({"detail": str(error)}, status=status.HTTP_409_CONFLICT)
 
             return Response(self.response_serializer(instance=booking).data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=["post"])
+    @idempotent
+    def bulk(self, request):
+        """
+        Create many bookings at once: POST /bookings/bulk/ with a list of bookings. Either all bookings are created
+        or none is, and the response reports the errors of each booking.
+        """
+
+        serializer = self.get_serializer(data=request.data, many=True, max_length=self.bulk_max_bookings)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bookings = Booking.bookings.create_bookings(serializer.validated_data)
+        except BookingsNotCreatedError as error:
+            return Response(error.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(self.response_serializer(instance=bookings, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream all bookings: GET /bookings/export/?export_format=ndjson (default) or ?export_format=csv
+
+        Rows are read with a server-side cursor in chunks and rendered while they are sent, so memory usage doesn't
+        grow with the number of bookings.
+        """
+
+        export_format = request.query_params.get("export_format", "ndjson")
+
+        if export_format not in ("ndjson", "csv"):
+            return Response({"export_format": ["Must be one of: ndjson, csv."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            Booking.bookings.order_by("id")
+            .values_list("id", "customer_id", "room_id", "from_date", "to_date", "price") # same order as EXPORT_FIELDS
+            .iterator(chunk_size=self.export_chunk_size)
+        )
+
+        if export_format == "csv":
+            response = StreamingHttpResponse(bookings_to_csv(rows), content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="bookings.csv"'
+        else:
+            response = StreamingHttpResponse(bookings_to_ndjson(rows), content_type="application/x-ndjson")
+
+        return response
+
+    @idempotent
     def update(self, request, *args, **kwargs):
 
         return self._update_booking(request)
 
+    @idempotent
     def partial_update(self, request, *args, **kwargs):
 
         return self._update_booking(request)
@@ -65,8 +223,81 @@ class BookingViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)  # de-serialize the data send in the request
 
         if serializer.is_valid():  # if valid, update the booking
-            booking.update_booking(**serializer.validated_data)
+            try:
+                booking.update_booking(**serializer.validated_data)
+            except RoomNotAvailableError as error:
+                return Response({"detail": str(error)}, status=status.HTTP_409_CONFLICT)
 
             return Response(self.response_serializer(instance=booking).data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class QuoteViewSet(viewsets.ViewSet):
+    """
+    Prices and availability of many stays at once, read with one or two queries: POST /quotes/ with
+    {"stays": [{"room": 1, "from_date": "YYYY-MM-DD", "to_date": "YYYY-MM-DD"}, ...]}, or with
+    {"from_date": "YYYY-MM-DD", "to_date": "YYYY-MM-DD", "filters": {"size_min": 2, ...}} for the matching rooms, a
+    page at a time (POST the same body to the next link for the following rooms).
+    """
+
+    throttle_classes = [BurstRateThrottle, SustainedRateThrottle]
+    read_only_writes = True # quotes are POSTed but only read
+
+    def create(self, request):
+
+        serializer = QuoteSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+
+        if "stays" in data:
+            quotes = quote_stays([(stay["room"], stay["from_date"], stay["to_date"]) for stay in data["stays"]])
+        else:
+            room_filter = RoomFilter(data.get("filters", {}), queryset=Room.objects.all())
+
+            if not room_filter.is_valid():
+                return Response({"filters": room_filter.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            paginator = RoomPagination()
+            rooms = paginator.paginate_queryset(room_filter.qs, request, view=self)
+
+            return paginator.get_paginated_response(quote_rooms(rooms, data["from_date"], data["to_date"]))
+
+        return Response({"results": quotes}, status=status.HTTP_200_OK)
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Revenue and occupancy reports (staff only), aggregated by the database.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @action(detail=False, methods=["get"])
+    def revenue(self, request):
+        """
+        Revenue of the bookings inside a window: GET /reports/revenue/?from_date=&to_date=&group_by=room,month
+        """
+
+        query_serializer = RevenueReportSerializer(data=request.query_params)
+
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"results": revenue_report(**query_serializer.validated_data)}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def occupancy(self, request):
+        """
+        Occupancy of the rooms inside a window: GET /reports/occupancy/?from_date=&to_date=
+        """
+
+        query_serializer = RoomAvailabilitySerializer(data=request.query_params)
+
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(occupancy_report(**query_serializer.validated_data), status=status.HTTP_200_OK)
@@ -0,0 +1,96 @@
+import hashlib
+from collections.abc import Callable, Iterable
+from django.conf import settings
+from django.core.cache import caches
+from .versions import bump_versions, get_version
+
+# Cache of the room catalog (list and retrieve responses of the rooms endpoint). Room rows change rarely, so the
+# responses are kept until a room is saved or deleted (see the receivers in models.py). Lists depend on every room
+# and are stored under a catalog version that is bumped on any change; each room detail is stored under a version of
+# its room that is bumped when that room changes. Versions are read before the rooms, so responses computed from rows
+# read before a change commits are stored under a version that is already dead. The cache alias is configurable with
+# ROOM_CACHE_ALIAS.
+
+CATALOG_VERSION_KEY = "rooms:catalog-version"
+HITS_KEY = "rooms:cache-hits"
+MISSES_KEY = "rooms:cache-misses"
+
+_missing = object()
+
+
+def get_cache():
+
+    return caches[settings.ROOM_CACHE_ALIAS]
+
+
+def catalog_version() -> int:
+
+    return get_version(get_cache(), CATALOG_VERSION_KEY)
+
+
+def _detail_version_key(room_id) -> str:
+
+    return f"rooms:detail-version:{room_id}"
+
+
+def _increment(key: str, initial: int=1) -> None:
+
+    cache = get_cache()
+
+    if not cache.add(key, initial, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError: # the key was evicted between add and incr
+            cache.add(key, initial, timeout=None)
+
+
+def _get_or_compute(key: str, compute: Callable):
+
+    cache = get_cache()
+    data = cache.get(key, _missing)
+
+    if data is _missing:
+        _increment(MISSES_KEY)
+        data = compute()
+        cache.set(key, data, timeout=settings.ROOM_CACHE_TIMEOUT)
+    else:
+        _increment(HITS_KEY)
+
+    return data
+
+
+def get_room_list(url: str, compute: Callable):
+    """
+    Cached response data of a room list request (the url includes filters, ordering and pagination cursor).
+    """
+
+    url_hash = hashlib.md5(url.encode()).hexdigest() # keeps keys short and valid for every cache backend
+
+    return _get_or_compute(f"rooms:list:{catalog_version()}:{url_hash}", compute)
+
+
+def get_room_detail(room_id, compute: Callable):
+    """
+    Cached response data of a room retrieve request.
+    """
+
+    return _get_or_compute(f"rooms:detail:{room_id}:{get_version(get_cache(), _detail_version_key(room_id))}",
+                           compute)
+
+
+def invalidate_rooms(room_ids: Iterable=()) -> None:
+    """
+    Drop every cached room list and the cached details of the given rooms.
+    """
+
+    bump_versions(get_cache(), [CATALOG_VERSION_KEY, *(_detail_version_key(room_id) for room_id in room_ids)])
+
+
+def cache_stats() -> dict[str, int]:
+    """
+    Hit and miss counters of the room cache (shared by all processes using the same cache backend).
+    """
+
+    counters = get_cache().get_many([HITS_KEY, MISSES_KEY])
+
+    return {"hits": counters.get(HITS_KEY, 0), "misses": counters.get(MISSES_KEY, 0)}
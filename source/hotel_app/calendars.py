@@ -0,0 +1,142 @@
+import base64
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.cache import caches
+from .versions import bump_versions, get_versions
+
+# Availability calendars: the booked nights of a room are kept in the cache as one bitmask per month (bit d is set
+# when night d + 1 of the month is booked), so a year of calendar is 12 cache entries per room. Missing months are
+# computed together, from a single range query over the bookings of their rooms. Months are stored under a version
+# of their room, which booking writes bump (see the receivers in models.py): the version is read before the
+# bookings, so months computed from bookings read before a write commits land under a version that is already dead.
+
+
+def get_cache():
+
+    return caches[settings.CALENDAR_CACHE_ALIAS]
+
+
+def _month_start(day: date) -> date:
+
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+
+    return (month + timedelta(days=31)).replace(day=1)
+
+
+def _months(from_date: date, to_date: date) -> list[date]:
+    """
+    First days of the months holding the nights of the [from_date, to_date) stay.
+    """
+
+    months = []
+    month = _month_start(from_date)
+
+    while month < to_date:
+        months.append(month)
+        month = _next_month(month)
+
+    return months
+
+
+def _version_key(room_id) -> str:
+
+    return f"calendar:{room_id}:version"
+
+
+def _room_versions(room_ids: list[int]) -> dict[int, int]:
+
+    versions = get_versions(get_cache(), map(_version_key, room_ids))
+
+    return {room_id: versions[_version_key(room_id)] for room_id in room_ids}
+
+
+def _key(room_id, version: int, month: date) -> str:
+
+    return f"calendar:{room_id}:{version}:{month:%Y-%m}"
+
+
+def _nights_mask(from_date: date, to_date: date, start: date) -> int:
+    """
+    Bits of the nights of the [from_date, to_date) stay, bit 0 being the night of start.
+    """
+
+    return ((1 << (to_date - from_date).days) - 1) << (from_date - start).days
+
+
+def _compute_months(room_months: dict[int, set[date]]) -> dict[tuple[int, date], int]:
+
+    from .models import Booking # models import this module
+
+    masks = {(room_id, month): 0 for room_id, months in room_months.items() for month in months}
+    first_month = min(month for months in room_months.values() for month in months)
+    last_month = max(month for months in room_months.values() for month in months)
+
+    bookings = Booking.bookings.filter(room_id__in=room_months).overlapping(
+        first_month, _next_month(last_month),
+    ).values_list("room_id", "from_date", "to_date")
+
+    for room_id, from_date, to_date in bookings:
+        for month in _months(from_date, to_date):
+            if (room_id, month) in masks:
+                next_month = _next_month(month)
+                masks[room_id, month] |= _nights_mask(max(from_date, month), min(to_date, next_month), month)
+
+    return masks
+
+
+def get_calendars(room_ids: Iterable[int], from_date: date, to_date: date) -> dict[int, bytes]:
+    """
+    Bitmap of the booked nights of each room during the [from_date, to_date) window: night i of the window is bit
+    i % 8 (least significant first) of byte i // 8, set when the night is booked.
+    """
+
+    cache = get_cache()
+    room_ids = list(room_ids)
+    months = _months(from_date, to_date)
+    versions = _room_versions(room_ids) # before the bookings are read
+    keys = {(room_id, month): _key(room_id, versions[room_id], month) for room_id in room_ids for month in months}
+
+    cached = cache.get_many(keys.values())
+    masks = {room_month: cached[key] for room_month, key in keys.items() if key in cached}
+
+    missing = defaultdict(set)
+    for room_id, month in keys.keys() - masks.keys():
+        missing[room_id].add(month)
+
+    if missing:
+        computed = _compute_months(missing)
+        cache.set_many({keys[room_month]: mask for room_month, mask in computed.items()},
+                       timeout=settings.CALENDAR_CACHE_TIMEOUT)
+        masks.update(computed)
+
+    nights = (to_date - from_date).days
+    offset = (from_date - months[0]).days
+    calendars = {}
+
+    for room_id in room_ids:
+        bits = 0
+        for month in reversed(months):
+            bits = (bits << (_next_month(month) - month).days) | masks[room_id, month]
+
+        window_bits = (bits >> offset) & ((1 << nights) - 1)
+        calendars[room_id] = window_bits.to_bytes((nights + 7) // 8, "little")
+
+    return calendars
+
+
+def encode_calendar(bitmap: bytes) -> str:
+
+    return base64.b64encode(bitmap).decode()
+
+
+def invalidate_calendars(room_ids: Iterable[int]) -> None:
+    """
+    Drop the cached months of the rooms (by bumping their versions).
+    """
+
+    bump_versions(get_cache(), {_version_key(room_id) for room_id in room_ids})
@@ -0,0 +1,22 @@
+from django.db.models import Func, IntegerField
+
+
+class DaysBetween(Func):
+    """
+    Number of days from the second date expression to the first one (end - start), as an integer.
+    """
+
+    arity = 2
+    output_field = IntegerField()
+    template = "(%(expressions)s)" # PostgreSQL and Oracle: date - date is a number of days
+    arg_joiner = " - "
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+
+        return self.as_sql(compiler, connection, template="CAST(ROUND(julianday(%(expressions)s)) AS INTEGER)",
+                           arg_joiner=") - julianday(", **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+
+        return self.as_sql(compiler, connection, template="DATEDIFF(%(expressions)s)", arg_joiner=", ",
+                           **extra_context)
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from hotel_app.models import RoomNight
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild the room nights table from the bookings."
+
+    def add_arguments(self, parser):
+
+        parser.add_argument("--batch-size", type=int, default=10000, help="Nights inserted per query.")
+
+    def handle(self, *args, **options):
+
+        start = time.perf_counter()
+        count = RoomNight.objects.rebuild(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(f"Created {count} room nights in {elapsed:.2f}s."))
@@ -0,0 +1,159 @@
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from hotel_app.models import Room, Booking, RoomNight, calculate_booking_price
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Fill the database with synthetic users, rooms and non-overlapping bookings for capacity planning. "
+        "Everything is inserted with bulk_create in batches."
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument("--users", type=int, default=1000, help="Users to create.")
+        parser.add_argument("--rooms", type=int, default=100, help="Rooms to create.")
+        parser.add_argument("--bookings", type=int, default=10000,
+                            help="Bookings to create (spread evenly across the new rooms).")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows inserted per query.")
+        parser.add_argument("--start-date", type=date.fromisoformat, default=date(2025, 1, 1),
+                            help="Date of the first booking of each room (YYYY-MM-DD).")
+        parser.add_argument("--max-nights", type=int, default=7, help="Longest stay.")
+        parser.add_argument("--password", default="password", help="Password of every new user.")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed, for reproducible data.")
+        parser.add_argument("--skip-room-nights", action="store_true",
+                            help="Don't fill the room nights table (run rebuild_room_nights later).")
+
+    def handle(self, *args, **options):
+
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        customer_ids = self.create_users(options["users"], options["password"])
+        if not customer_ids:
+            customer_ids = list(User.objects.values_list("id", flat=True))
+        if not customer_ids and options["bookings"]:
+            raise CommandError("Bookings need customers: create some users (--users).")
+
+        rooms = self.create_rooms(options["rooms"])
+        self.create_bookings(rooms, customer_ids, options["bookings"], options["start_date"], options["max_nights"],
+                             with_room_nights=not options["skip_room_nights"])
+
+    def report(self, label: str, rows: int, start: float) -> None:
+
+        elapsed = time.perf_counter() - start
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f"{label}: {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+    def batches(self, rows):
+        """
+        Split an iterable of rows into lists of batch_size rows.
+        """
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def create_users(self, count: int, password: str) -> list[int]:
+
+        start = time.perf_counter()
+        password_hash = make_password(password) # hashing is slow, every user gets the same hash
+        run = uuid.uuid4().hex[:8] # keeps emails unique across runs
+
+        user_ids = []
+        users = (User(email=f"seed-{run}-{i}@example.com", password=password_hash) for i in range(count))
+        for batch in self.batches(users):
+            user_ids.extend(user.pk for user in User.objects.bulk_create(batch)) # creates the profiles too
+
+        self.report("Users (and profiles)", count, start)
+
+        return user_ids
+
+    def create_rooms(self, count: int) -> list[Room]:
+
+        start = time.perf_counter()
+        run = uuid.uuid4().hex[:4]
+
+        rooms = []
+        new_rooms = (
+            Room(number=f"{run}-{i}", size=self.random.randint(15, 60), price=self.random.randint(50, 400))
+            for i in range(count)
+        )
+        for batch in self.batches(new_rooms):
+            rooms.extend(Room.objects.bulk_create(batch))
+
+        self.report("Rooms", count, start)
+
+        return rooms
+
+    def generate_bookings(self, rooms: list[Room], customer_ids: list[int], count: int, start_date: date,
+                          max_nights: int):
+        """
+        Non-overlapping bookings: each room gets its share of bookings one after another, with random gaps.
+        """
+
+        for index, room in enumerate(rooms):
+            room_bookings = count // len(rooms) + (1 if index < count % len(rooms) else 0)
+            from_date = start_date + timedelta(days=self.random.randint(0, 3))
+
+            for _ in range(room_bookings):
+                to_date = from_date + timedelta(days=self.random.randint(1, max_nights))
+                yield Booking(
+                    customer_id=self.random.choice(customer_ids),
+                    room_id=room.pk,
+                    from_date=from_date,
+                    to_date=to_date,
+                    price=calculate_booking_price(from_date, to_date, room.price, room.pk),
+                )
+                from_date = to_date + timedelta(days=self.random.randint(0, 3))
+
+    def create_bookings(self, rooms: list[Room], customer_ids: list[int], count: int, start_date: date,
+                        max_nights: int, with_room_nights: bool) -> None:
+
+        if not rooms or not count:
+            return
+
+        start = time.perf_counter()
+        nights = 0
+
+        # room nights are many small rows: insert them with executemany, skipping the model instances
+        quote_name = connection.ops.quote_name
+        insert_room_nights = (
+            f"INSERT INTO {quote_name(RoomNight._meta.db_table)} "
+            f"({quote_name('room_id')}, {quote_name('date')}, {quote_name('booking_id')}) VALUES (%s, %s, %s)"
+        )
+        adapt_date = connection.ops.adapt_datefield_value
+
+        bookings = self.generate_bookings(rooms, customer_ids, count, start_date, max_nights)
+        for batch in self.batches(bookings):
+            with transaction.atomic():
+                batch = Booking.bookings.bulk_create(batch)
+                if with_room_nights:
+                    room_nights = [
+                        (booking.room_id, adapt_date(booking.from_date + timedelta(days=day)), booking.pk)
+                        for booking in batch
+                        for day in range((booking.to_date - booking.from_date).days)
+                    ]
+                    with connection.cursor() as cursor:
+                        cursor.executemany(insert_room_nights, room_nights)
+                    nights += len(room_nights)
+
+        self.report("Bookings", count, start)
+        if with_room_nights:
+            self.stdout.write(f"Room nights: {nights} rows")
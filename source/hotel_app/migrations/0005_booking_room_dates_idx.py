@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 17:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0004_alter_booking_managers_booking_booking_price_check'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'from_date', 'to_date'], name='booking_room_dates_idx'),
+        ),
+    ]
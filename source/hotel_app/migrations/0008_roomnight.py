@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def create_room_nights(apps, schema_editor):
+
+    Booking = apps.get_model("hotel_app", "Booking")
+    RoomNight = apps.get_model("hotel_app", "RoomNight")
+
+    batch_size = 10000
+    nights = []
+    bookings = Booking._default_manager.values_list("id", "room_id", "from_date", "to_date").iterator(
+        chunk_size=batch_size
+    )
+    for booking_id, room_id, from_date, to_date in bookings:
+        nights.extend(
+            RoomNight(room_id=room_id, booking_id=booking_id, date=from_date + timedelta(days=day))
+            for day in range((to_date - from_date).days)
+        )
+        if len(nights) >= batch_size:
+            # bookings created before overlaps were rejected may share nights
+            RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+            nights = []
+
+    RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0007_room_updated_at_booking_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='hotel_app.booking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hotel_app.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='room_night_unique')],
+            },
+        ),
+        migrations.RunPython(create_room_nights, migrations.RunPython.noop),
+    ]
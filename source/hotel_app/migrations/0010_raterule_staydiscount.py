@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 18:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0009_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('from_date', models.DateField()),
+                ('to_date', models.DateField()),
+                ('weekdays', models.JSONField(blank=True, default=list, help_text='Weekdays the rule applies to (0 is monday), every day if empty.')),
+                ('price', models.IntegerField(blank=True, help_text='Nightly price.', null=True)),
+                ('percent', models.IntegerField(blank=True, help_text='Nightly price, in percent of the room price.', null=True)),
+                ('priority', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rate_rules', to='hotel_app.room')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('to_date__gt', models.F('from_date'))), name='rate_rule_dates'), models.CheckConstraint(condition=models.Q(('price__isnull', False), ('percent__isnull', False), _connector='XOR'), name='rate_rule_price_or_percent')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StayDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_nights', models.PositiveIntegerField()),
+                ('percent', models.PositiveSmallIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stay_discounts', to='hotel_app.room')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('percent__lte', 100)), name='stay_discount_percent')],
+            },
+        ),
+    ]
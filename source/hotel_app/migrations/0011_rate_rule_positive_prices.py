@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0010_raterule_staydiscount'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='staydiscount',
+            name='stay_discount_percent',
+        ),
+        migrations.AddConstraint(
+            model_name='raterule',
+            constraint=models.CheckConstraint(condition=models.Q(('price__isnull', True), ('price__gt', 0), _connector='OR'), name='rate_rule_price_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='raterule',
+            constraint=models.CheckConstraint(condition=models.Q(('percent__isnull', True), ('percent__gt', 0), _connector='OR'), name='rate_rule_percent_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='staydiscount',
+            constraint=models.CheckConstraint(condition=models.Q(('percent__lt', 100)), name='stay_discount_percent'),
+        ),
+    ]
@@ -1,18 +1,61 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from bisect import bisect_left, insort
+from collections import defaultdict
+from .cache import invalidate_rooms
+from .calendars import invalidate_calendars
+from .pricing import get_pricing_rules, invalidate_pricing_rules
 
 # Create your models here.
 
 User = get_user_model()
 
 
+class RoomQuerySet(models.QuerySet):
+
+    def available(self, from_date: date, to_date: date) -> "RoomQuerySet":
+        """
+        Rooms without any booking overlapping the [from_date, to_date) stay.
+
+        The overlap check is a NOT EXISTS anti-join served by the (room, from_date, to_date) booking index.
+        """
+
+        overlapping_bookings = Booking.bookings.filter(room=OuterRef("pk")).overlapping(from_date, to_date)
+
+        return self.filter(~Exists(overlapping_bookings))
+
+    # bulk operations don't send the signals that invalidate the room cache, so they do it themselves
+
+    def bulk_create(self, objs, *args, **kwargs):
+
+        rooms = super().bulk_create(objs, *args, **kwargs)
+        transaction.on_commit(invalidate_rooms, using=self.db)
+
+        return rooms
+
+    def update(self, **kwargs):
+
+        kwargs.setdefault("updated_at", timezone.now()) # auto_now is only applied by save()
+        room_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        transaction.on_commit(lambda: invalidate_rooms(room_ids), using=self.db)
+
+        return rows
+
+
 class Room(models.Model):
 
     id = models.AutoField(primary_key=True)
     number = models.CharField(max_length=10, null=False)
     size = models.IntegerField(null=False)
     price = models.IntegerField(null=False)
+    updated_at = models.DateTimeField(auto_now=True) # used for ETag and Last-Modified headers
+    objects = RoomQuerySet.as_manager()
 
     class Meta:
 
@@ -21,30 +64,265 @@ class Room(models.Model):
             models.CheckConstraint(check=models.Q(price__gt=0), name='room_price_check'), # room price must be > 0
         ]
 
+        indexes = [
+            # serve filtering and ordering of rooms
+            models.Index(fields=["size"], name="room_size_idx"),
+            models.Index(fields=["price"], name="room_price_idx"),
+        ]
+
     def __str__(self):
         return self.number
 
 
-def calculate_booking_price(from_date: date, to_date: date, room_price: int) -> int:
+def calculate_booking_price(from_date: date, to_date: date, room_price: int, room_id: int=None) -> int:
     """
-    Calculate the booking price.
+    Calculate the booking price: the sum of the nightly rates of the stay (room_price, unless a rate rule of the
+    room, or of every room, applies) minus the length of stay discount, if any.
     """
 
-    price = (to_date - from_date).days * room_price
+    price = get_pricing_rules().price(from_date, to_date, room_price, room_id)
 
     return price
 
 
-class BookingManager(models.Manager):
+class PricingRuleQuerySet(models.QuerySet):
+
+    # bulk operations don't send the signals that invalidate the pricing rules, so they do it themselves
+
+    def bulk_create(self, objs, *args, **kwargs):
+
+        rules = super().bulk_create(objs, *args, **kwargs)
+        transaction.on_commit(invalidate_pricing_rules, using=self.db)
+
+        return rules
+
+    def update(self, **kwargs):
+
+        rows = super().update(**kwargs)
+        transaction.on_commit(invalidate_pricing_rules, using=self.db)
+
+        return rows
+
+
+class RateRule(models.Model):
+    """
+    Nightly rate of the nights between from_date and to_date (excluded), e.g. a season, optionally only on some
+    weekdays (e.g. weekends): either a fixed price or a percentage of the room price. Rules apply to one room, or
+    to every room when room is empty. When several rules match a night, the one with the highest priority wins
+    (then the room rule over the rule of every room, then the newest rule).
+    """
+
+    name = models.CharField(max_length=100)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, null=True, blank=True, related_name="rate_rules")
+    from_date = models.DateField()
+    to_date = models.DateField()
+    weekdays = models.JSONField(default=list, blank=True,
+                                help_text="Weekdays the rule applies to (0 is monday), every day if empty.")
+    price = models.IntegerField(null=True, blank=True, help_text="Nightly price.")
+    percent = models.IntegerField(null=True, blank=True, help_text="Nightly price, in percent of the room price.")
+    priority = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PricingRuleQuerySet.as_manager()
+
+    class Meta:
+
+        constraints = [
+            models.CheckConstraint(condition=Q(to_date__gt=models.F("from_date")), name="rate_rule_dates"),
+            models.CheckConstraint(condition=Q(price__isnull=False) ^ Q(percent__isnull=False),
+                                   name="rate_rule_price_or_percent"),
+            # bookings must cost more than 0
+            models.CheckConstraint(condition=Q(price__isnull=True) | Q(price__gt=0), name="rate_rule_price_positive"),
+            models.CheckConstraint(condition=Q(percent__isnull=True) | Q(percent__gt=0),
+                                   name="rate_rule_percent_positive"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class StayDiscount(models.Model):
+    """
+    Discount (in percent) of the stays of at least min_nights nights, in one room or in every room when room is
+    empty. When several discounts apply to a stay, the biggest one is used.
+    """
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, null=True, blank=True, related_name="stay_discounts")
+    min_nights = models.PositiveIntegerField()
+    percent = models.PositiveSmallIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PricingRuleQuerySet.as_manager()
+
+    class Meta:
+
+        constraints = [
+            models.CheckConstraint(condition=Q(percent__lt=100), name="stay_discount_percent"), # never free
+        ]
+
+    def __str__(self):
+        return f"{self.percent}% from {self.min_nights} nights"
+
+
+class RoomNotAvailableError(Exception):
+    """
+    Raised when a booking overlaps another booking of the same room.
+    """
+
+
+class BookingsNotCreatedError(Exception):
+    """
+    Raised by BookingManager.create_bookings when some bookings are invalid. errors has one dict per booking
+    (empty for valid bookings), mapping field names to lists of error messages.
+    """
+
+    def __init__(self, errors: list[dict]):
+
+        super().__init__("Some bookings could not be created.")
+        self.errors = errors
+
+
+class BookingQuerySet(models.QuerySet):
+
+    def overlapping(self, from_date: date, to_date: date) -> "BookingQuerySet":
+        """
+        Bookings overlapping the [from_date, to_date) stay (a booking may start the day another one ends).
+        """
+
+        return self.filter(from_date__lt=to_date, to_date__gt=from_date)
+
+    def update(self, **kwargs):
+
+        kwargs.setdefault("updated_at", timezone.now()) # auto_now is only applied by save()
+
+        if not kwargs.keys() & {"room", "room_id", "from_date", "to_date"}:
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db):
+            bookings = dict(self.values_list("pk", "room_id"))
+            rows = super().update(**kwargs)
+            updated_bookings = list(self.model.bookings.filter(pk__in=bookings).only("room_id", "from_date", "to_date"))
+
+            # update() bypasses update_booking: recreate the nights of the updated bookings
+            RoomNight.objects.filter(booking_id__in=bookings).delete()
+            RoomNight.objects.bulk_create(night for booking in updated_bookings for night in RoomNight.nights_of(booking))
+
+        # update() doesn't send the signals that invalidate the calendars: drop those of the rooms before and after
+        # the update
+        room_ids = {*bookings.values(), *(booking.room_id for booking in updated_bookings)}
+        _invalidate_calendars(room_ids, using=self.db)
+
+        return rows
+
+
+def _invalidate_calendars(room_ids, using: str) -> None:
+
+    # right away for the requests of this transaction, and after the commit for those that read the bookings before
+    # it (their months are stored under the version bumped right away)
+    room_ids = list(room_ids)
+    invalidate_calendars(room_ids)
+    transaction.on_commit(lambda: invalidate_calendars(room_ids), using=using)
+
+
+class BookingManager(models.Manager.from_queryset(BookingQuerySet)):
 
     def create(self, customer: User, from_date: date, to_date: date, room: Room) -> "Booking":
 
-        booking_price = calculate_booking_price(from_date, to_date, room.price)
+        booking_price = calculate_booking_price(from_date, to_date, room.price, room.pk)
         booking = self.model(customer=customer, from_date=from_date, to_date=to_date, room=room, price=booking_price)
-        booking.save()
+
+        with transaction.atomic():
+            self.check_room_is_available(room, from_date, to_date)
+            booking.save()
+            RoomNight.objects.bulk_create(RoomNight.nights_of(booking))
 
         return booking
 
+    def check_room_is_available(self, room: Room, from_date: date, to_date: date, exclude_booking_id: int=None) -> None:
+        """
+        Lock the room row (SELECT ... FOR UPDATE) and raise RoomNotAvailableError if the stay overlaps another
+        booking of the room. Must run inside a transaction: the lock is held until it ends, so concurrent writers
+        are serialized per room while bookings for other rooms proceed in parallel.
+        """
+
+        Room.objects.select_for_update().get(pk=room.pk)
+
+        overlapping_bookings = self.filter(room=room).overlapping(from_date, to_date)
+        if exclude_booking_id is not None:
+            overlapping_bookings = overlapping_bookings.exclude(pk=exclude_booking_id)
+
+        if overlapping_bookings.exists():
+            raise RoomNotAvailableError(f"Room {room} is already booked between {from_date} and {to_date}.")
+
+    def create_bookings(self, bookings_data: list[dict], batch_size: int=1000) -> list["Booking"]:
+        """
+        Create many bookings in a single transaction. Each item of bookings_data has customer and room ids,
+        from_date and to_date. Customers and rooms are fetched with one IN query each, overlaps (against existing
+        bookings and within the batch) are checked with one range query, and bookings are inserted with bulk_create.
+        Nothing is saved if any booking is invalid: BookingsNotCreatedError reports the errors of every booking.
+        """
+
+        customers = User.objects.in_bulk({data["customer"] for data in bookings_data})
+        room_ids = {data["room"] for data in bookings_data}
+
+        with transaction.atomic():
+            # lock the rooms in a consistent order to avoid deadlocks with other writers
+            rooms = {room.pk: room for room in Room.objects.select_for_update().filter(pk__in=room_ids).order_by("pk")}
+
+            # sorted (from_date, to_date) intervals booked in each room during the period covered by the batch
+            booked = defaultdict(list)
+            if bookings_data:
+                existing_bookings = self.filter(room_id__in=rooms).overlapping(
+                    min(data["from_date"] for data in bookings_data),
+                    max(data["to_date"] for data in bookings_data),
+                ).order_by("from_date").values_list("room_id", "from_date", "to_date")
+                for room_id, from_date, to_date in existing_bookings:
+                    booked[room_id].append((from_date, to_date))
+
+            bookings = []
+            errors = []
+            for data in bookings_data:
+                item_errors = {}
+                customer = customers.get(data["customer"])
+                room = rooms.get(data["room"])
+
+                if customer is None:
+                    item_errors["customer"] = [f"Invalid pk \"{data['customer']}\" - object does not exist."]
+                if room is None:
+                    item_errors["room"] = [f"Invalid pk \"{data['room']}\" - object does not exist."]
+                elif _overlaps_any(booked[room.pk], data["from_date"], data["to_date"]):
+                    item_errors["non_field_errors"] = [
+                        f"Room {room} is already booked between {data['from_date']} and {data['to_date']}."
+                    ]
+                else: # later bookings of the batch can't overlap this one
+                    insort(booked[room.pk], (data["from_date"], data["to_date"]))
+
+                errors.append(item_errors)
+                if not item_errors:
+                    bookings.append(self.model.create_booking(customer, data["from_date"], data["to_date"], room))
+
+            if any(errors):
+                raise BookingsNotCreatedError(errors)
+
+            bookings = self.bulk_create(bookings, batch_size=batch_size)
+            RoomNight.objects.bulk_create((night for booking in bookings for night in RoomNight.nights_of(booking)),
+                                          batch_size=batch_size)
+            # bulk_create doesn't send the signals that invalidate the calendars
+            _invalidate_calendars({booking.room_id for booking in bookings}, using=self.db)
+
+            return bookings
+
+
+def _overlaps_any(intervals: list[tuple[date, date]], from_date: date, to_date: date) -> bool:
+    """
+    Check if the [from_date, to_date) stay overlaps any of the sorted, non-overlapping intervals.
+    """
+
+    # the only candidate is the last interval starting before to_date
+    index = bisect_left(intervals, (to_date,)) - 1
+
+    return index >= 0 and intervals[index][1] > from_date
+
 
 class Booking(models.Model):
 
@@ -54,6 +332,7 @@ class Booking(models.Model):
     customer = models.ForeignKey(User, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     price = models.IntegerField(null=False)
+    updated_at = models.DateTimeField(auto_now=True) # used for ETag and Last-Modified headers
     bookings = BookingManager() # default object manager
 
     class Meta:
@@ -69,13 +348,24 @@ class Booking(models.Model):
             ),
         ]
 
+        indexes = [
+            # serves overlap checks for a given room (availability search)
+            models.Index(fields=["room", "from_date", "to_date"], name="booking_room_dates_idx"),
+            # serves keyset pagination of bookings
+            models.Index(fields=["from_date", "id"], name="booking_from_date_id_idx"),
+            # serve filtering and ordering of bookings
+            models.Index(fields=["customer", "from_date"], name="booking_customer_idx"),
+            models.Index(fields=["to_date"], name="booking_to_date_idx"),
+            models.Index(fields=["price"], name="booking_price_idx"),
+        ]
+
     @classmethod
     def create_booking(cls, customer: User, from_date: date, to_date: date, room: Room) -> "Booking":
         """
         Create a new booking (not saved into the database). Used primarily with bulk_create method.
         """
 
-        booking_price = calculate_booking_price(from_date, to_date, room.price)
+        booking_price = calculate_booking_price(from_date, to_date, room.price, room.pk)
         booking = Booking(customer=customer, from_date=from_date, to_date=to_date, room=room, price=booking_price)
 
         return booking
@@ -83,6 +373,7 @@ class Booking(models.Model):
     def update_booking(self, from_date: date=None, to_date: date=None, room: Room=None) -> None:
 
         fields_to_update = []
+        previous_room_id, previous_from_date, previous_to_date = self.room_id, self.from_date, self.to_date
 
         # update fields
         if from_date is not None and self.from_date != from_date:
@@ -97,10 +388,123 @@ class Booking(models.Model):
 
         if fields_to_update:
             # recalculate booking price
-            self.price = calculate_booking_price(self.from_date, self.to_date, self.room.price)
-            fields_to_update.append("price")
+            self.price = calculate_booking_price(self.from_date, self.to_date, self.room.price, self.room_id)
+            fields_to_update.extend(["price", "updated_at"])
 
-            self.save(update_fields=fields_to_update)
+            with transaction.atomic():
+                Booking.bookings.check_room_is_available(self.room, self.from_date, self.to_date,
+                                                         exclude_booking_id=self.pk)
+                self.save(update_fields=fields_to_update)
+                RoomNight.objects.update_booking_nights(self, previous_room_id, previous_from_date, previous_to_date)
+                # the new room is invalidated by the post_save receiver
+                _invalidate_calendars([previous_room_id], using=self._state.db)
 
     def __str__(self):
-        return self.customer.email
\ No newline at end of file
+        return self.customer.email
+
+
+class RoomNightManager(models.Manager):
+
+    def update_booking_nights(self, booking: Booking, previous_room_id: int, previous_from_date: date,
+                              previous_to_date: date) -> None:
+        """
+        Bring the nights of an updated booking up to date, touching only the nights that changed.
+        """
+
+        if booking.room_id != previous_room_id:
+            self.filter(booking=booking).delete()
+            self.bulk_create(RoomNight.nights_of(booking))
+            return
+
+        # nights no longer covered by the booking
+        self.filter(booking=booking).exclude(date__gte=booking.from_date, date__lt=booking.to_date).delete()
+
+        # nights now covered by the booking
+        self.bulk_create(
+            night for night in RoomNight.nights_of(booking)
+            if not previous_from_date <= night.date < previous_to_date
+        )
+
+    def rebuild(self, batch_size: int=10000) -> int:
+        """
+        Recreate the whole table from the bookings (reading them in chunks and inserting the nights in batches).
+        Returns the number of nights created.
+        """
+
+        with transaction.atomic():
+            self.all().delete()
+
+            nights = []
+            bookings = Booking.bookings.values_list("id", "room_id", "from_date", "to_date").iterator(
+                chunk_size=batch_size
+            )
+            for booking_id, room_id, from_date, to_date in bookings:
+                nights.extend(
+                    RoomNight(room_id=room_id, booking_id=booking_id, date=from_date + timedelta(days=day))
+                    for day in range((to_date - from_date).days)
+                )
+                if len(nights) >= batch_size:
+                    # bookings created before overlaps were rejected may share nights
+                    self.bulk_create(nights, ignore_conflicts=True)
+                    nights = []
+
+            self.bulk_create(nights, ignore_conflicts=True)
+
+            return self.count()
+
+
+class RoomNight(models.Model):
+    """
+    One row per booked night of a room (derived from the bookings), so per-night lookups are point reads of the
+    (room, date) unique index. Kept up to date by BookingManager.create, BookingManager.create_bookings,
+    Booking.update_booking and BookingQuerySet.update, nights are deleted in cascade with their booking. Rebuild it from scratch with the
+    rebuild_room_nights management command.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    date = models.DateField(null=False)
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="nights")
+    objects = RoomNightManager()
+
+    class Meta:
+
+        constraints = [
+            # a room can't be booked twice the same night
+            models.UniqueConstraint(fields=["room", "date"], name="room_night_unique"),
+        ]
+
+    @staticmethod
+    def nights_of(booking: Booking) -> list["RoomNight"]:
+        """
+        Nights of a booking (not saved into the database).
+        """
+
+        return [
+            RoomNight(room_id=booking.room_id, booking_id=booking.pk, date=booking.from_date + timedelta(days=day))
+            for day in range((booking.to_date - booking.from_date).days)
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} {self.date}"
+
+
+@receiver([post_save, post_delete], sender=Room)
+def invalidate_room_cache(sender, instance, using, **kwargs):
+
+    room_id = instance.pk # the pk of a deleted room is cleared before the transaction commits
+    transaction.on_commit(lambda: invalidate_rooms([room_id]), using=using)
+
+
+@receiver([post_save, post_delete], sender=RateRule)
+@receiver([post_save, post_delete], sender=StayDiscount)
+def invalidate_pricing_rules_cache(sender, using, **kwargs):
+
+    # on commit: rules loaded before would miss the change, and a rolled back change must not stay loaded
+    transaction.on_commit(invalidate_pricing_rules, using=using)
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def invalidate_booking_calendars(sender, instance, using, **kwargs):
+
+    _invalidate_calendars([instance.room_id], using=using)
@@ -0,0 +1,133 @@
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.cache import caches
+from .versions import bump_versions, get_version
+
+# Pricing rules (RateRule and StayDiscount rows) are few and read by every booking, so each process keeps them in
+# memory and prices stays without queries. A rules version in the shared cache is bumped when a change to the rules
+# is committed (see the receivers in models.py); a process reloads its rules (two queries) when the version differs
+# from the one it loaded. The version is only shared when PRICING_CACHE_ALIAS is shared by the processes (Redis,
+# Memcached, ...), so rules are also reloaded when they're older than PRICING_RULES_MAX_AGE seconds.
+
+VERSION_KEY = "pricing:rules-version"
+
+_loaded = None # (version, load time, PricingRules) of this process
+
+
+def get_cache():
+
+    return caches[settings.PRICING_CACHE_ALIAS]
+
+
+def rules_version() -> int:
+
+    return get_version(get_cache(), VERSION_KEY)
+
+
+def invalidate_pricing_rules() -> None:
+
+    bump_versions(get_cache(), [VERSION_KEY])
+
+
+class PricingRules:
+    """
+    In-memory rate rules and stay discounts. The rule of each night covered by the rules is looked up once and
+    remembered (by night, and by room for the rooms having their own rules), so pricing a stay is a single pass
+    summing its nightly rates.
+    """
+
+    max_night_rules = 100_000 # remembered nights, forgotten all at once when full
+
+    def __init__(self, rate_rules, stay_discounts):
+
+        # by precedence: highest priority, room rules before the rules of every room, newest rule
+        self.rate_rules = sorted(rate_rules, key=lambda rule: (-rule.priority, rule.room_id is None, -rule.pk))
+        self.stay_discounts = list(stay_discounts)
+        self._night_rules = {} # (room_id or None, night) -> rule or None
+        self._rule_rooms = {rule.room_id for rule in self.rate_rules if rule.room_id is not None}
+        self._from_date = min((rule.from_date for rule in self.rate_rules), default=None)
+        self._to_date = max((rule.to_date for rule in self.rate_rules), default=None)
+
+    def night_rule(self, room_id: int | None, night: date):
+
+        if not self.rate_rules or not self._from_date <= night < self._to_date:
+            return None
+
+        # rooms without rules of their own share the rules of every room
+        key = (room_id if room_id in self._rule_rooms else None, night)
+
+        try:
+            return self._night_rules[key]
+        except KeyError:
+            pass
+
+        weekday = night.weekday()
+        rule = next((
+            rule for rule in self.rate_rules
+            if rule.room_id in (None, room_id) and rule.from_date <= night < rule.to_date
+            and (not rule.weekdays or weekday in rule.weekdays)
+        ), None)
+
+        if len(self._night_rules) >= self.max_night_rules:
+            self._night_rules.clear()
+        self._night_rules[key] = rule
+
+        return rule
+
+    def nightly_rates(self, from_date: date, to_date: date, room_price: int, room_id: int = None) -> list[int]:
+
+        rates = []
+        for day in range((to_date - from_date).days):
+            rule = self.night_rule(room_id, from_date + timedelta(days=day))
+            if rule is None:
+                rates.append(room_price)
+            elif rule.price is not None:
+                rates.append(rule.price)
+            else:
+                rates.append(round(room_price * rule.percent / 100))
+
+        return rates
+
+    def discount(self, nights: int, room_id: int = None) -> int:
+        """
+        Discount (in percent) of a stay.
+        """
+
+        return max((discount.percent for discount in self.stay_discounts
+                    if discount.room_id in (None, room_id) and nights >= discount.min_nights), default=0)
+
+    def price(self, from_date: date, to_date: date, room_price: int, room_id: int = None) -> int:
+
+        nights = (to_date - from_date).days
+
+        if self.rate_rules:
+            price = sum(self.nightly_rates(from_date, to_date, room_price, room_id))
+        else:
+            price = nights * room_price
+
+        discount = self.discount(nights, room_id)
+        if discount:
+            price -= round(price * discount / 100)
+
+        # small percentages of small prices round down to 0, bookings must cost more than that
+        return max(price, 1)
+
+
+def get_pricing_rules() -> PricingRules:
+    """
+    Pricing rules of this process, reloaded if they changed.
+    """
+
+    global _loaded
+
+    version = rules_version()
+    loaded = _loaded
+
+    if loaded is None or loaded[0] != version or time.monotonic() - loaded[1] > settings.PRICING_RULES_MAX_AGE:
+        from .models import RateRule, StayDiscount # models import this module
+
+        loaded = _loaded = (version, time.monotonic(),
+                            PricingRules(RateRule.objects.all(), StayDiscount.objects.all()))
+
+    return loaded[2]
@@ -0,0 +1,86 @@
+from collections import defaultdict
+from datetime import date
+from django.db.models import DateField, IntegerField, QuerySet, Value
+from .models import Room, Booking, _overlaps_any
+from .pricing import get_pricing_rules
+
+
+def _rooms_and_bookings(rooms: QuerySet, from_date: date, to_date: date) -> tuple[dict, dict]:
+    """
+    Prices of the rooms, and the sorted (from_date, to_date) intervals booked in each of them between from_date and
+    to_date, read with a single query (UNION ALL of the rooms and of their bookings).
+    """
+
+    room_rows = rooms.order_by().annotate(
+        kind=Value(0), stay_from=Value(None, output_field=DateField()), stay_to=Value(None, output_field=DateField()),
+    ).values_list("kind", "id", "price", "stay_from", "stay_to")
+
+    booking_rows = Booking.bookings.filter(room__in=rooms.order_by().values("id")).overlapping(
+        from_date, to_date,
+    ).order_by().annotate(
+        kind=Value(1), room_price=Value(None, output_field=IntegerField()),
+    ).values_list("kind", "room_id", "room_price", "from_date", "to_date")
+
+    prices = {}
+    booked = defaultdict(list)
+    for kind, room_id, price, booked_from, booked_to in room_rows.union(booking_rows, all=True):
+        if kind == 0:
+            prices[room_id] = price
+        else:
+            booked[room_id].append((booked_from, booked_to))
+
+    for intervals in booked.values():
+        intervals.sort()
+
+    return prices, booked
+
+
+def _quote(prices: dict, booked: dict, stays) -> list[dict]:
+
+    rules = get_pricing_rules()
+    quotes = []
+
+    for room_id, from_date, to_date in stays:
+        room_price = prices.get(room_id)
+        quotes.append({
+            "room": room_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            # unknown rooms are quoted as unavailable, without price
+            "available": room_price is not None and not _overlaps_any(booked[room_id], from_date, to_date),
+            "price": rules.price(from_date, to_date, room_price, room_id) if room_price is not None else None,
+        })
+
+    return quotes
+
+
+def quote_stays(stays: list[tuple[int, date, date]]) -> list[dict]:
+    """
+    Price and availability of (room id, from_date, to_date) stays, priced like calculate_booking_price.
+    """
+
+    if not stays:
+        return []
+
+    room_ids = {room_id for room_id, _, _ in stays}
+    prices, booked = _rooms_and_bookings(Room.objects.filter(pk__in=room_ids),
+                                         min(from_date for _, from_date, _ in stays),
+                                         max(to_date for _, _, to_date in stays))
+
+    return _quote(prices, booked, stays)
+
+
+def quote_rooms(rooms: list[Room], from_date: date, to_date: date) -> list[dict]:
+    """
+    Price and availability of a stay in each of the (fetched) rooms, priced like calculate_booking_price.
+    """
+
+    booked = defaultdict(list)
+    bookings = Booking.bookings.filter(room__in=[room.pk for room in rooms]).overlapping(
+        from_date, to_date,
+    ).order_by("from_date").values_list("room_id", "from_date", "to_date")
+
+    for room_id, booked_from, booked_to in bookings:
+        booked[room_id].append((booked_from, booked_to))
+
+    return _quote({room.pk: room.price for room in rooms}, booked, [(room.pk, from_date, to_date) for room in rooms])
@@ -0,0 +1,120 @@
+from datetime import date
+from django.db.models import Q, F, Sum, Value, FloatField, FilteredRelation
+from django.db.models.functions import Cast, Coalesce, Greatest, Least
+from .functions import DaysBetween
+from .models import Room, Booking
+
+# Revenue and occupancy reports. Grouping and sums are done by the database; a booking that is only partly inside
+# a period (the report window or a month) counts only its nights inside the period, and its price is prorated.
+
+MAX_REPORT_MONTHS = 36 # months are computed as columns of a single query, so their number is limited
+
+
+def clipped_nights(start: date, end: date, prefix: str=""):
+    """
+    Nights of a booking inside the [start, end) period (only meaningful for bookings overlapping the period).
+    """
+
+    return DaysBetween(Least(F(f"{prefix}to_date"), Value(end)), Greatest(F(f"{prefix}from_date"), Value(start)))
+
+
+def prorated_price(start: date, end: date):
+    """
+    Part of a booking's price corresponding to its nights inside the [start, end) period.
+    """
+
+    return (Cast(F("price") * clipped_nights(start, end), FloatField())
+            / Cast(DaysBetween(F("to_date"), F("from_date")), FloatField()))
+
+
+def months_between(from_date: date, to_date: date) -> list[tuple[date, date]]:
+    """
+    [start, end) periods of the months covered by the [from_date, to_date) window, clipped to the window.
+    """
+
+    months = []
+    month_start = from_date.replace(day=1)
+
+    while month_start < to_date:
+        next_month_start = date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+        months.append((max(month_start, from_date), min(next_month_start, to_date)))
+        month_start = next_month_start
+
+    return months
+
+
+def revenue_report(from_date: date, to_date: date, group_by: list[str]) -> list[dict]:
+    """
+    Revenue and booked nights inside the [from_date, to_date) window, grouped by any of "room", "customer" and
+    "month" (an empty group_by gives the totals of the window). Runs a single query.
+    """
+
+    bookings = Booking.bookings.overlapping(from_date, to_date)
+    keys = [key for key in ("room", "customer") if key in group_by]
+
+    if "month" in group_by: # one pair of revenue/nights columns per month
+        months = months_between(from_date, to_date)
+        aggregates = {}
+        for index, (start, end) in enumerate(months):
+            in_month = Q(from_date__lt=end, to_date__gt=start)
+            aggregates[f"revenue_{index}"] = Sum(prorated_price(start, end), filter=in_month)
+            aggregates[f"nights_{index}"] = Sum(clipped_nights(start, end), filter=in_month)
+    else:
+        months = [(from_date, to_date)]
+        aggregates = {
+            "revenue_0": Sum(prorated_price(from_date, to_date)),
+            "nights_0": Sum(clipped_nights(from_date, to_date)),
+        }
+
+    if keys:
+        rows = list(bookings.values(*keys).annotate(**aggregates).order_by(*keys))
+    else:
+        rows = [bookings.aggregate(**aggregates)]
+
+    report = []
+    for row in rows:
+        for index, (start, end) in enumerate(months):
+            nights = row[f"nights_{index}"]
+            if keys and not nights: # skip empty months of a room/customer
+                continue
+
+            line = {key: row[key] for key in keys}
+            if "month" in group_by:
+                line["month"] = start.strftime("%Y-%m")
+            line["nights"] = nights or 0
+            line["revenue"] = round(row[f"revenue_{index}"] or 0, 2)
+            report.append(line)
+
+    return report
+
+
+def occupancy_report(from_date: date, to_date: date) -> dict:
+    """
+    Booked nights and occupancy rate of every room inside the [from_date, to_date) window, and the overall
+    occupancy rate. Runs a single query (rooms left-joined with the bookings overlapping the window).
+    """
+
+    window_nights = (to_date - from_date).days
+
+    rooms = (
+        Room.objects
+        .annotate(window_booking=FilteredRelation(
+            "booking", condition=Q(booking__from_date__lt=to_date, booking__to_date__gt=from_date)
+        ))
+        .annotate(nights=Coalesce(Sum(clipped_nights(from_date, to_date, prefix="window_booking__")), 0))
+        .order_by("id")
+        .values("id", "nights")
+    )
+
+    results = [
+        {"room": room["id"], "nights": room["nights"], "occupancy": round(room["nights"] / window_nights, 4)}
+        for room in rooms
+    ]
+    available_nights = window_nights * len(results)
+    booked_nights = sum(room["nights"] for room in results)
+
+    return {
+        "nights": window_nights,
+        "occupancy": round(booked_nights / available_nights, 4) if available_nights else 0,
+        "results": results,
+    }
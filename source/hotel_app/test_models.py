@@ -1,9 +1,19 @@
-from django.db import IntegrityError
-from django.test import TestCase
-from .models import Room, Booking, calculate_booking_price
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from .models import (Room, Booking, RoomNight, RoomNotAvailableError, RateRule, StayDiscount,
+                     calculate_booking_price)
+from .pricing import get_pricing_rules, invalidate_pricing_rules
+from . import calendars
+from .calendars import get_calendars
+from .versions import bump_versions, get_version, get_versions
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
+from users_app.models import UserProfile
+from django.core.management import call_command
 from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
+from io import StringIO
 
 
 User = get_user_model()
@@ -126,3 +136,384 @@ class BookingTests(TestCase):
         )
 
         self.assertEqual(Booking.bookings.count(), 0)
+
+    def test_cant_create_overlapping_bookings_for_the_same_room(self):
+
+        room, user = self.create_user_and_room()
+        Booking.bookings.create(customer=user, room=room, from_date=self.from_date, to_date=self.to_date)
+
+        with self.assertRaises(RoomNotAvailableError):
+            Booking.bookings.create(customer=user, room=room, from_date=date(2025,12,10), to_date=date(2025,12,12))
+
+        self.assertEqual(Booking.bookings.count(), 1)
+
+    def test_booking_can_start_the_day_another_booking_ends(self):
+
+        room, user = self.create_user_and_room()
+        Booking.bookings.create(customer=user, room=room, from_date=self.from_date, to_date=self.to_date)
+        Booking.bookings.create(customer=user, room=room, from_date=self.to_date, to_date=date(2025,12,15))
+
+        self.assertEqual(Booking.bookings.count(), 2)
+
+    def test_cant_update_booking_to_overlap_another_booking(self):
+
+        room, user = self.create_user_and_room()
+        Booking.bookings.create(customer=user, room=room, from_date=self.from_date, to_date=self.to_date)
+        booking = Booking.bookings.create(customer=user, room=room, from_date=date(2025,12,20),
+                                          to_date=date(2025,12,25))
+
+        with self.assertRaises(RoomNotAvailableError):
+            booking.update_booking(from_date=date(2025,12,5))
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.from_date, date(2025,12,20))
+
+    def test_update_booking_doesnt_overlap_itself(self):
+
+        room, user = self.create_user_and_room()
+        booking = Booking.bookings.create(customer=user, room=room, from_date=self.from_date, to_date=self.to_date)
+
+        booking.update_booking(to_date=date(2025,12,15))
+
+        self.assertEqual(Booking.bookings.get(pk=booking.pk).to_date, date(2025,12,15))
+
+
+class PricingTests(TestCase):
+
+    def setUp(self):
+
+        self.room = Room.objects.create(number="Room 1", size=25, price=100)
+        self.other_room = Room.objects.create(number="Room 2", size=25, price=200)
+        # 2025-12-01 is a monday: its 10 nights include a weekend
+
+        self.addCleanup(invalidate_pricing_rules) # the rules of the test are rolled back
+
+    def change_rules(self):
+        """
+        Rules are reloaded when their changes are committed: run the commit callbacks.
+        """
+
+        return self.captureOnCommitCallbacks(execute=True)
+
+    def test_price_without_rules(self):
+
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,11), 100, self.room.pk), 1000)
+
+    def test_season_and_weekend_rules(self):
+
+        with self.change_rules():
+            RateRule.objects.create(name="December", from_date=date(2025,12,1), to_date=date(2026,1,1), percent=150)
+            RateRule.objects.create(name="Weekends", room=self.room, from_date=date(2025,1,1),
+                                    to_date=date(2026,1,1), weekdays=[5, 6], price=300, priority=1)
+
+        # 8 weekdays at 150 and 2 weekend nights at 300
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,11), 100, self.room.pk), 1800)
+        # the weekend rule is for the first room only
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,11), 200, self.other_room.pk), 3000)
+        # the nights of november are out of the season
+        self.assertEqual(calculate_booking_price(date(2025,11,28), date(2025,12,2), 200, self.other_room.pk), 900)
+
+    def test_room_rule_wins_over_rule_of_every_room(self):
+
+        with self.change_rules():
+            RateRule.objects.create(name="Every room", from_date=date(2025,12,1), to_date=date(2026,1,1),
+                                    percent=150)
+            RateRule.objects.create(name="Room 1", room=self.room, from_date=date(2025,12,1), to_date=date(2026,1,1),
+                                    percent=50)
+
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,3), 100, self.room.pk), 100)
+
+    def test_stay_discounts(self):
+
+        with self.change_rules():
+            StayDiscount.objects.create(min_nights=7, percent=10)
+            StayDiscount.objects.create(room=self.room, min_nights=3, percent=5)
+
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,3), 100, self.room.pk), 200)
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,4), 100, self.room.pk), 285)
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,8), 100, self.room.pk), 630)
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,4), 200, self.other_room.pk), 600)
+
+    def test_rules_are_cached_and_reloaded_when_they_change(self):
+
+        get_pricing_rules()
+
+        with self.assertNumQueries(0):
+            calculate_booking_price(date(2025,12,1), date(2025,12,11), 100, self.room.pk)
+
+        with self.change_rules():
+            rule = RateRule.objects.create(name="December", from_date=date(2025,12,1), to_date=date(2026,1,1),
+                                           price=90)
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,11), 100, self.room.pk), 900)
+
+        with self.change_rules():
+            RateRule.objects.filter(pk=rule.pk).update(price=80)
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,11), 100, self.room.pk), 800)
+
+        with self.change_rules():
+            rule.delete()
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,11), 100, self.room.pk), 1000)
+
+    def test_rules_pricing_stays_at_0_are_rejected(self):
+
+        for rule in [RateRule(name="Free", from_date=date(2025,12,1), to_date=date(2026,1,1), price=0),
+                     RateRule(name="Negative", from_date=date(2025,12,1), to_date=date(2026,1,1), price=-10),
+                     RateRule(name="Free", from_date=date(2025,12,1), to_date=date(2026,1,1), percent=0),
+                     StayDiscount(min_nights=1, percent=100)]:
+            with self.subTest(rule=rule), self.assertRaises(IntegrityError), transaction.atomic():
+                rule.save()
+
+    def test_rounded_prices_cost_at_least_1(self):
+
+        with self.change_rules():
+            RateRule.objects.create(name="Almost free", from_date=date(2025,12,1), to_date=date(2026,1,1), percent=1)
+            StayDiscount.objects.create(min_nights=1, percent=99)
+
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,2), 10, self.room.pk), 1)
+
+    def test_remembered_night_rules_are_bounded(self):
+
+        with self.change_rules():
+            RateRule.objects.create(name="December", from_date=date(2025,12,1), to_date=date(2026,1,1), percent=150)
+            RateRule.objects.create(name="Room 1", room=self.room, from_date=date(2025,12,1), to_date=date(2026,1,1),
+                                    percent=50)
+        rules = get_pricing_rules()
+
+        for room_id in range(1000, 1100): # rooms without rules of their own share the remembered nights
+            rules.price(date(2025,11,1), date(2026,2,1), 100, room_id)
+        self.assertEqual(len(rules._night_rules), 31) # the nights out of every rule aren't remembered
+
+        with patch.object(rules, "max_night_rules", 10): # the nights of the first room are remembered by room
+            rules.price(date(2025,12,1), date(2025,12,31), 100, self.room.pk)
+        self.assertLessEqual(len(rules._night_rules), 10)
+
+    @override_settings(PRICING_RULES_MAX_AGE=0)
+    def test_rules_are_reloaded_when_too_old(self):
+
+        # a rule changed by another process, whose version change this process didn't see
+        RateRule.objects.create(name="December", from_date=date(2025,12,1), to_date=date(2026,1,1), price=90)
+
+        self.assertEqual(calculate_booking_price(date(2025,12,1), date(2025,12,11), 100, self.room.pk), 900)
+
+    def test_bookings_are_priced_with_the_rules(self):
+
+        with self.change_rules():
+            RateRule.objects.create(name="December", room=self.room, from_date=date(2025,12,1),
+                                    to_date=date(2026,1,1), price=120)
+        user = User.objects.create(email="testuser@example.com", password="testpassword")
+
+        booking = Booking.bookings.create(customer=user, from_date=date(2025,11,30), to_date=date(2025,12,2),
+                                          room=self.room)
+        self.assertEqual(booking.price, 220)
+
+        booking.update_booking(to_date=date(2025,12,3))
+        self.assertEqual(booking.price, 340)
+
+
+class CalendarTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.user = User.objects.create(email="testuser@example.com", password="testpassword")
+        self.room = Room.objects.create(number="Room 1", size=25, price=100)
+
+    def booked_nights(self, from_date=date(2025,12,1), to_date=date(2025,12,8)):
+
+        bitmap = int.from_bytes(get_calendars([self.room.pk], from_date, to_date)[self.room.pk], "little")
+
+        return [night for night in range((to_date - from_date).days) if bitmap >> night & 1]
+
+    def test_bulk_writes_invalidate_the_calendar(self):
+
+        self.assertEqual(self.booked_nights(), [])
+
+        Booking.bookings.create_bookings([{"customer": self.user.pk, "room": self.room.pk,
+                                           "from_date": date(2025,12,2), "to_date": date(2025,12,4)}])
+        self.assertEqual(self.booked_nights(), [1, 2])
+
+        Booking.bookings.update(from_date=date(2025,12,5), to_date=date(2025,12,6))
+        self.assertEqual(self.booked_nights(), [4])
+
+        Booking.bookings.all().delete()
+        self.assertEqual(self.booked_nights(), [])
+
+    def test_months_computed_before_a_write_are_not_kept(self):
+
+        compute_months = calendars._compute_months
+
+        def compute_months_then_book(room_months):
+            masks = compute_months(room_months)
+            # a booking committed after the bookings were read, before the months are cached
+            Booking.bookings.create(customer=self.user, room=self.room, from_date=date(2025,12,2),
+                                    to_date=date(2025,12,4))
+            return masks
+
+        with patch.object(calendars, "_compute_months", compute_months_then_book):
+            self.assertEqual(self.booked_nights(), [])
+
+        self.assertEqual(self.booked_nights(), [1, 2])
+
+    def test_calendar_over_months_and_years(self):
+
+        Booking.bookings.create(customer=self.user, room=self.room, from_date=date(2025,12,30), to_date=date(2026,3,2))
+
+        # january and february are fully booked
+        self.assertEqual(self.booked_nights(date(2025,12,29), date(2026,3,3)), list(range(1, 63)))
+
+
+class VersionTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+
+    def test_versions_are_started_then_kept(self):
+
+        versions = get_versions(cache, ["a", "b"])
+
+        self.assertEqual(get_versions(cache, ["a", "b"]), versions)
+        self.assertEqual(get_version(cache, "a"), versions["a"])
+
+    def test_bumped_and_evicted_versions_never_come_back(self):
+
+        version = get_version(cache, "a")
+
+        bump_versions(cache, ["a"])
+        bumped_version = get_version(cache, "a")
+        cache.delete("a") # evicted
+
+        self.assertLess(version, bumped_version)
+        self.assertLess(bumped_version, get_version(cache, "a"))
+
+
+class RoomNightTests(TestCase):
+
+    def setUp(self):
+
+        self.room = Room.objects.create(number="Room 1", size=25, price=100)
+        self.user = User.objects.create(email="testuser@example.com", password="testpassword")
+
+    def booked_nights(self, room=None):
+
+        return list(RoomNight.objects.filter(room=room or self.room).order_by("date").values_list("date", flat=True))
+
+    def test_nights_are_created_with_the_booking(self):
+
+        Booking.bookings.create(customer=self.user, room=self.room, from_date=date(2025,12,1), to_date=date(2025,12,4))
+
+        self.assertEqual(self.booked_nights(), [date(2025,12,1), date(2025,12,2), date(2025,12,3)])
+
+    def test_nights_follow_booking_updates(self):
+
+        booking = Booking.bookings.create(customer=self.user, room=self.room, from_date=date(2025,12,1),
+                                          to_date=date(2025,12,4))
+
+        booking.update_booking(from_date=date(2025,12,2), to_date=date(2025,12,6))
+
+        self.assertEqual(self.booked_nights(), [date(2025,12,d) for d in range(2, 6)])
+
+        other_room = Room.objects.create(number="Room 2", size=25, price=100)
+        booking.update_booking(room=other_room)
+
+        self.assertEqual(self.booked_nights(), [])
+        self.assertEqual(self.booked_nights(other_room), [date(2025,12,d) for d in range(2, 6)])
+
+    def test_nights_follow_queryset_updates(self):
+
+        booking = Booking.bookings.create(customer=self.user, room=self.room, from_date=date(2025,12,1),
+                                          to_date=date(2025,12,4))
+        other_room = Room.objects.create(number="Room 2", size=25, price=100)
+
+        Booking.bookings.filter(pk=booking.pk).update(room=other_room, to_date=date(2025,12,3))
+
+        self.assertEqual(self.booked_nights(), [])
+        self.assertEqual(self.booked_nights(other_room), [date(2025,12,1), date(2025,12,2)])
+
+    def test_nights_are_deleted_with_the_booking(self):
+
+        booking = Booking.bookings.create(customer=self.user, room=self.room, from_date=date(2025,12,1),
+                                          to_date=date(2025,12,4))
+
+        booking.delete()
+
+        self.assertEqual(RoomNight.objects.count(), 0)
+
+    def test_nights_are_created_with_bulk_bookings(self):
+
+        Booking.bookings.create_bookings([
+            {"customer": self.user.pk, "room": self.room.pk, "from_date": date(2025,12,1), "to_date": date(2025,12,3)},
+            {"customer": self.user.pk, "room": self.room.pk, "from_date": date(2025,12,5), "to_date": date(2025,12,6)},
+        ])
+
+        self.assertEqual(self.booked_nights(), [date(2025,12,1), date(2025,12,2), date(2025,12,5)])
+
+    def test_rebuild_room_nights_command(self):
+
+        # bulk_create skips the nights
+        Booking.bookings.bulk_create([
+            Booking.create_booking(self.user, date(2025,12,1), date(2025,12,3), self.room),
+            Booking.create_booking(self.user, date(2025,12,3), date(2025,12,4), self.room),
+        ])
+
+        output = StringIO()
+        call_command("rebuild_room_nights", stdout=output)
+
+        self.assertEqual(self.booked_nights(), [date(2025,12,1), date(2025,12,2), date(2025,12,3)])
+        self.assertIn("Created 3 room nights", output.getvalue())
+
+
+class SeedHotelCommandTests(TestCase):
+
+    def test_seed_hotel_command(self):
+
+        output = StringIO()
+        call_command("seed_hotel", users=5, rooms=3, bookings=31, seed=1, stdout=output)
+
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(UserProfile.objects.count(), 5)
+        self.assertEqual(Room.objects.count(), 3)
+        self.assertEqual(Booking.bookings.count(), 31)
+        self.assertIn("rows/s", output.getvalue())
+
+        # bookings of a room don't overlap
+        for room in Room.objects.all():
+            bookings = list(Booking.bookings.filter(room=room).order_by("from_date"))
+            for previous, booking in zip(bookings, bookings[1:]):
+                self.assertLessEqual(previous.to_date, booking.from_date)
+
+        # the room nights match the bookings
+        expected_nights = sum((booking.to_date - booking.from_date).days for booking in Booking.bookings.all())
+        self.assertEqual(RoomNight.objects.count(), expected_nights)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+
+    databases = "__all__" # reads outside transactions may be routed to a read replica
+    writers = 8
+
+    def create_booking(self, customer, room):
+
+        try:
+            return Booking.bookings.create(customer=customer, room=room, from_date=date(2025,12,1),
+                                           to_date=date(2025,12,11))
+        except RoomNotAvailableError:
+            return None
+        finally:
+            connection.close() # each thread has its own connection
+
+    def test_concurrent_writers_cant_double_book_a_room(self):
+
+        user = User.objects.create(email="testuser@example.com", password="testpassword")
+        shared_room = Room.objects.create(number="Room 1", size=25, price=100)
+        other_rooms = [Room.objects.create(number=f"Room {i}", size=25, price=100) for i in range(2, self.writers + 2)]
+
+        with ThreadPoolExecutor(max_workers=self.writers) as executor:
+            shared_room_results = list(executor.map(lambda _: self.create_booking(user, shared_room),
+                                                    range(self.writers)))
+            other_rooms_results = list(executor.map(lambda room: self.create_booking(user, room), other_rooms))
+
+        # exactly one writer books the contended room, while bookings for different rooms all succeed
+        self.assertEqual(len([booking for booking in shared_room_results if booking is not None]), 1)
+        self.assertEqual(Booking.bookings.filter(room=shared_room).count(), 1)
+        self.assertTrue(all(booking is not None for booking in other_rooms_results))
@@ -0,0 +1,36 @@
+from datetime import date
+from django.contrib.auth import get_user_model
+from .models import Room, Booking
+
+
+User = get_user_model()
+
+
+def create_bookings() -> None:
+    """
+    Test data shared by the test modules: 10 rooms and 10 users, with a booking of each room from 2025-12-01 to
+    2025-12-11.
+    """
+
+    rooms = []
+    users = []
+    for i in range(1, 11): # create rooms and users
+        rooms.append(Room(number=f"Room {i}", size=25, price=100))
+        users.append(User(email=f"testuser{i}@example.com", password="testpassword"))
+
+    Room.objects.bulk_create(rooms)
+    User.objects.bulk_create(users)
+
+    bookings = []
+    for i in range(len(rooms)): # create bookings
+        from_date = date(2025,12,1)
+        to_date = date(2025,12,11)
+        bookings.append(
+            Booking.create_booking(
+                customer=users[i],
+                room=rooms[i],
+                from_date=from_date,
+                to_date=to_date,
+            ))
+
+    Booking.bookings.bulk_create(bookings)
@@ -0,0 +1,40 @@
+import time
+from collections.abc import Iterable
+
+# Versioned cache keys, used by the room, calendar and pricing caches: data is cached under keys holding the version
+# of what it was computed from, and a write drops it by setting a new version. Versions are times, so a version key
+# evicted from the cache never comes back with a value it already had (which would bring back stale data).
+
+
+def new_version() -> int:
+
+    return time.time_ns()
+
+
+def get_versions(cache, keys: Iterable[str]) -> dict[str, int]:
+    """
+    Current versions of the keys (a single get_many when they're all set), starting the missing ones.
+    """
+
+    keys = list(keys)
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            version = new_version()
+            if not cache.add(key, version, timeout=None): # started by another process in the meantime
+                version = cache.get(key, version)
+            versions[key] = version
+
+    return versions
+
+
+def get_version(cache, key: str) -> int:
+
+    return get_versions(cache, [key])[key]
+
+
+def bump_versions(cache, keys: Iterable[str]) -> None:
+
+    version = new_version()
+    cache.set_many({key: version for key in keys}, timeout=None)
@@ -0,0 +1,11 @@
+from .views import ProfileViewSet
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+
+
+router = DefaultRouter()
+router.register(r"profiles", ProfileViewSet, basename="profile")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
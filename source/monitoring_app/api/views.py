@@ -0,0 +1,69 @@
+import io
+import pstats
+from datetime import datetime, timezone
+from django.http import FileResponse, HttpResponse
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from ..profiling import profile_path, stored_profiles
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Request profiles stored by the profiling middleware (staff only).
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    lookup_value_regex = r"[\w-]+"
+    stats_sort_keys = ("cumulative", "tottime", "calls")
+
+    def list(self, request):
+
+        return Response([
+            {
+                "id": path.stem,
+                "size": stat.st_size,
+                "created": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            }
+            for path in stored_profiles()
+            for stat in (path.stat(),)
+        ])
+
+    def retrieve(self, request, pk=None):
+        """
+        Download a profile (pstats format, e.g. for snakeviz): GET /monitoring/profiles/<id>/
+        """
+
+        path = profile_path(pk)
+
+        if path is None:
+            return Response({"detail": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name,
+                            content_type="application/octet-stream")
+
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """
+        Text summary of a profile: GET /monitoring/profiles/<id>/stats/?sort=cumulative&limit=50
+        """
+
+        path = profile_path(pk)
+
+        if path is None:
+            return Response({"detail": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        sort = request.query_params.get("sort", "cumulative")
+        if sort not in self.stats_sort_keys:
+            return Response({"sort": [f"Must be one of {', '.join(self.stats_sort_keys)}."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get("limit", 50))
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        output = io.StringIO()
+        pstats.Stats(str(path), stream=output).sort_stats(sort).print_stats(limit)
+
+        return HttpResponse(output.getvalue(), content_type="text/plain")
@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from pathlib import Path
+from django.conf import settings
+
+
+COUNTERS = {
+    "http_requests_total": "Requests by route name, method and status code.",
+    "http_request_errors_total": "Requests answered with a 5xx status code, by route name and method.",
+}
+
+HISTOGRAMS = {
+    "http_request_duration_seconds": (
+        "Request duration in seconds, by route name and method.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    "db_queries_per_request": (
+        "Database queries run by a request, by route name and method.",
+        (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    "db_duration_seconds": (
+        "Time spent in database queries by a request, by route name and method.",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    ),
+}
+
+
+def series_key(name: str, labels: dict[str, str]) -> str:
+
+    return json.dumps([name, sorted(labels.items())])
+
+
+class _StoreOwner:
+    """
+    Kept in the thread-local data of a thread, so it is collected when the thread ends.
+    """
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of this process. Every thread updates its own store, so recording a value takes no lock;
+    the stores are summed when the metrics are collected. The store of a thread that ends is added to a shared total
+    and dropped, so threads that come and go don't pile up stores.
+
+    With METRICS_DIR set, the process also writes a snapshot of its metrics to METRICS_DIR/<pid>.json at most every
+    METRICS_FLUSH_INTERVAL seconds, and collect() adds up the snapshots of the other processes (WSGI/ASGI workers),
+    so that any worker can answer a scrape.
+    """
+
+    def __init__(self):
+
+        self._local = threading.local()
+        self._stores = [] # (counters, histograms) of every live thread
+        self._ended = {"counters": {}, "histograms": {}} # metrics of the threads that ended
+        # only taken when a thread records its first value, or ends; reentrant as a store can end during a collection
+        self._stores_lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _store(self) -> tuple[dict, dict]:
+
+        store = getattr(self._local, "store", None)
+
+        if store is None:
+            store = self._local.store = ({}, {})
+            self._local.owner = owner = _StoreOwner()
+            with self._stores_lock:
+                self._stores.append(store)
+            weakref.finalize(owner, self._end_store, store)
+
+        return store
+
+    def _end_store(self, store: tuple[dict, dict]) -> None:
+
+        counters, histograms = store
+        with self._stores_lock:
+            self._stores.remove(store)
+            merge_snapshots(self._ended, {"counters": counters, "histograms": histograms})
+
+    def inc(self, name: str, labels: dict[str, str], value: float = 1) -> None:
+
+        counters = self._store()[0]
+        key = series_key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: dict[str, str], value: float) -> None:
+
+        histograms = self._store()[1]
+        key = series_key(name, labels)
+        buckets = HISTOGRAMS[name][1]
+
+        histogram = histograms.get(key)
+        if histogram is None:
+            # a count per bucket, the +Inf bucket, then the sum of the values
+            histogram = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+    def reset(self) -> None:
+
+        with self._stores_lock:
+            for counters, histograms in self._stores:
+                counters.clear()
+                histograms.clear()
+            self._ended = {"counters": {}, "histograms": {}}
+
+    def snapshot(self) -> dict:
+        """
+        Metrics of this process, summed over its threads.
+        """
+
+        snapshot = {"counters": {}, "histograms": {}}
+
+        with self._stores_lock:
+            stores = list(self._stores)
+            merge_snapshots(snapshot, self._ended)
+
+        for counters, histograms in stores:
+            # dict.copy() is atomic, the owner thread may be updating the store
+            merge_snapshots(snapshot, {"counters": counters.copy(), "histograms": histograms.copy()})
+
+        return snapshot
+
+    @staticmethod
+    def snapshot_dir() -> Path | None:
+
+        return Path(settings.METRICS_DIR) if settings.METRICS_DIR else None
+
+    def flush(self) -> None:
+
+        directory = self.snapshot_dir()
+        if directory is None:
+            return
+
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        temporary_path = path.with_suffix(".tmp")
+        temporary_path.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary_path, path) # readers never see a partial file
+
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self) -> None:
+
+        if self.snapshot_dir() is None or time.monotonic() - self._last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+
+        # a single thread writes the snapshot, the others go on
+        if self._flush_lock.acquire(blocking=False):
+            try:
+                self.flush()
+            finally:
+                self._flush_lock.release()
+
+    def collect(self) -> dict:
+        """
+        Metrics of this process and the latest snapshots of the other processes.
+        """
+
+        metrics = self.snapshot()
+        directory = self.snapshot_dir()
+
+        if directory is not None and directory.is_dir():
+            own_snapshot = f"{os.getpid()}.json"
+            for path in directory.glob("*.json"):
+                if path.name != own_snapshot:
+                    merge_snapshots(metrics, json.loads(path.read_text()))
+
+        return metrics
+
+    def render(self) -> str:
+
+        return render_metrics(self.collect())
+
+
+def merge_snapshots(target: dict, snapshot: dict) -> None:
+
+    counters = target["counters"]
+    for key, value in snapshot["counters"].items():
+        counters[key] = counters.get(key, 0) + value
+
+    histograms = target["histograms"]
+    for key, values in snapshot["histograms"].items():
+        histogram = histograms.get(key)
+        if histogram is None:
+            histograms[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                histogram[i] += value
+
+
+def format_labels(labels: list[tuple[str, str]]) -> str:
+
+    def escape(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels) + "}" if labels else ""
+
+
+def format_value(value: float) -> str:
+
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_metrics(metrics: dict) -> str:
+    """
+    Prometheus text exposition format (version 0.0.4).
+    """
+
+    series = {} # name -> [(labels, values)]
+    for kind in ("counters", "histograms"):
+        for key, values in metrics[kind].items():
+            name, labels = json.loads(key)
+            series.setdefault(name, []).append((labels, values))
+
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for labels, value in sorted(series.get(name, []), key=lambda item: item[0]):
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, values in sorted(series.get(name, []), key=lambda item: item[0]):
+            cumulative = 0
+            for bound, count in zip((*map(format_value, buckets), "+Inf"), values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels([*labels, ('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(values[-1])}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,186 @@
+import logging
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from .metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a request runs more queries than the budget of its endpoint (only if QUERY_BUDGETS_ENFORCED).
+    """
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording the SQL and duration of every query.
+    """
+
+    def __init__(self):
+
+        self.queries = [] # (sql, seconds)
+
+    def __call__(self, execute, sql, params, many, context):
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Measure the number and time of the database queries and the total time of every request, and report them in
+    a Server-Timing header (db and total metrics). Requests slower than SLOW_REQUEST_THRESHOLD_MS are logged with
+    their SQL, and requests running more queries than their endpoint's QUERY_BUDGETS entry are logged too (or fail
+    with QueryBudgetExceeded when QUERY_BUDGETS_ENFORCED, e.g. in tests).
+
+    Async requests only get the total time: their queries run in another thread, out of reach of the wrappers.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        total = time.perf_counter() - start
+        request.query_recorder = recorder
+        response["Server-Timing"] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", total;dur={total * 1000:.1f}'
+        )
+
+        self.check_slow_request(request, total, recorder)
+        self.check_query_budget(request, recorder)
+
+        return response
+
+    async def __acall__(self, request):
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        response["Server-Timing"] = f"total;dur={(time.perf_counter() - start) * 1000:.1f}"
+
+        return response
+
+    @staticmethod
+    def route_name(request) -> str | None:
+
+        resolver_match = getattr(request, "resolver_match", None)
+
+        return resolver_match.url_name if resolver_match is not None else None
+
+    def check_slow_request(self, request, total: float, recorder: QueryRecorder) -> None:
+
+        if total * 1000 < settings.SLOW_REQUEST_THRESHOLD_MS:
+            return
+
+        logger.warning(
+            "Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms\n%s",
+            request.method, request.path, self.route_name(request), total * 1000, recorder.count,
+            recorder.duration * 1000, "\n".join(f"[{duration * 1000:.1f} ms] {sql}" for sql, duration in recorder.queries),
+        )
+
+    def check_query_budget(self, request, recorder: QueryRecorder) -> None:
+
+        route_name = self.route_name(request)
+        if route_name is None:
+            return
+
+        # budgets are given per route name ("booking-list") or per method and route name ("POST booking-list")
+        budget = settings.QUERY_BUDGETS.get(f"{request.method} {route_name}", settings.QUERY_BUDGETS.get(route_name))
+        if budget is None or recorder.count <= budget:
+            return
+
+        message = (f"{request.method} {request.path} ({route_name}) ran {recorder.count} queries, "
+                   f"its budget is {budget}:\n" + "\n".join(sql for sql, _ in recorder.queries))
+
+        if settings.QUERY_BUDGETS_ENFORCED:
+            raise QueryBudgetExceeded(message)
+
+        logger.warning(message)
+
+
+class MetricsMiddleware:
+    """
+    Record the count, status, duration and database queries of every request in the metrics registry, labelled by
+    route name and method (requests to unknown URLs share the "unresolved" route). Must come before
+    QueryInstrumentationMiddleware, whose query recorder it reads.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+
+        return response
+
+    async def __acall__(self, request):
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+
+        return response
+
+    @staticmethod
+    def record(request, response, duration: float) -> None:
+
+        labels = {"route": QueryInstrumentationMiddleware.route_name(request) or "unresolved", "method": request.method}
+
+        registry.inc("http_requests_total", {**labels, "status": str(response.status_code)})
+        if response.status_code >= 500:
+            registry.inc("http_request_errors_total", labels)
+        registry.observe("http_request_duration_seconds", labels, duration)
+
+        recorder = getattr(request, "query_recorder", None)
+        if recorder is not None:
+            registry.observe("db_queries_per_request", labels, recorder.count)
+            registry.observe("db_duration_seconds", labels, recorder.duration)
+
+        registry.maybe_flush()
@@ -0,0 +1,141 @@
+import cProfile
+import random
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+
+
+PROFILE_ID_RE = re.compile(r"^[\w-]+$")
+
+
+def profiles_dir() -> Path:
+
+    return Path(settings.PROFILING_DIR)
+
+
+def profile_path(profile_id: str) -> Path | None:
+    """
+    Path of a stored profile, or None if the id is malformed or unknown.
+    """
+
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+
+    path = profiles_dir() / f"{profile_id}.prof"
+
+    return path if path.is_file() else None
+
+
+def stored_profiles() -> list[Path]:
+    """
+    Stored profiles, newest first.
+    """
+
+    directory = profiles_dir()
+    if not directory.is_dir():
+        return []
+
+    return sorted(directory.glob("*.prof"), key=lambda path: path.name, reverse=True)
+
+
+def save_profile(profiler: cProfile.Profile, request) -> str:
+    """
+    Write the profile of a request to PROFILING_DIR, drop the oldest ones above PROFILING_MAX_PROFILES and return its id.
+    """
+
+    resolver_match = getattr(request, "resolver_match", None)
+    route_name = resolver_match.url_name if resolver_match is not None else None
+    # ids sort by time and tell the request apart: 20261018T101500123456-GET-booking-list-1a2b3c4d
+    profile_id = "-".join((datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f"), request.method,
+                           route_name or "unresolved", uuid.uuid4().hex[:8]))
+
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+
+    for path in stored_profiles()[settings.PROFILING_MAX_PROFILES:]:
+        path.unlink(missing_ok=True)
+
+    return profile_id
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests with cProfile when PROFILING_ENABLED, and store the profiles for download from
+    /api/monitoring/profiles/. A request is profiled when a staff user sends the PROFILING_HEADER header, or with
+    the PROFILING_SAMPLE_RATE probability; the id of its profile is returned in the X-Profile-Id header. The staff
+    check happens before profiling starts: session users are known already, API clients are authenticated with
+    PROFILING_AUTHENTICATION_CLASSES (cheap ones: other credentials, such as Basic, can't request profiles).
+
+    When disabled the middleware removes itself from the chain (MiddlewareNotUsed), so it costs nothing. Async
+    requests are not profiled: cProfile only follows the thread that started it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.authentication_classes = [import_string(path) for path in settings.PROFILING_AUTHENTICATION_CLASSES]
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+
+        requested = self.profiling_requested(request)
+        sampled = not requested and random.random() < settings.PROFILING_SAMPLE_RATE
+
+        if not requested and not sampled:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        response["X-Profile-Id"] = save_profile(profiler, request)
+
+        return response
+
+    def profiling_requested(self, request) -> bool:
+
+        if settings.PROFILING_HEADER not in request.META:
+            return False
+
+        user = self.authenticated_user(request)
+
+        return user is not None and user.is_staff
+
+    def authenticated_user(self, request):
+        """
+        User of the session, or of the API credentials of the request, or None.
+        """
+
+        if request.user.is_authenticated:
+            return request.user
+
+        for authentication_class in self.authentication_classes:
+            try:
+                result = authentication_class().authenticate(request)
+            except AuthenticationFailed:
+                return None
+            if result is not None:
+                return result[0]
+
+        return None
@@ -0,0 +1,280 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from hotel_app.testing import create_bookings
+from hotel_app.api.views import BookingViewSet
+from users_app.api.authentication import create_token
+from .metrics import MetricsRegistry, registry
+from .middleware import QueryBudgetExceeded
+
+
+User = get_user_model()
+
+
+class QueryInstrumentationMiddlewareTests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+        cache.clear()
+        create_bookings()
+
+    def test_server_timing_header(self):
+
+        response = self.client.get(reverse("booking-detail", kwargs={"pk": 1}))
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="2 queries", total;dur=[\d.]+$')
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+
+        with self.assertLogs("monitoring_app.middleware", level="WARNING") as logs:
+            self.client.get(reverse("booking-detail", kwargs={"pk": 1}))
+
+        self.assertIn("Slow request GET /api/bookings/1/ (booking-detail)", logs.output[0])
+        self.assertIn('FROM "hotel_app_booking"', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={"booking-detail": 1}, QUERY_BUDGETS_ENFORCED=True)
+    def test_enforced_query_budget(self):
+
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse("booking-detail", kwargs={"pk": 1}))
+
+    @override_settings(QUERY_BUDGETS={"GET booking-detail": 1})
+    def test_exceeded_query_budget_is_logged(self):
+
+        with self.assertLogs("monitoring_app.middleware", level="WARNING") as logs:
+            response = self.client.get(reverse("booking-detail", kwargs={"pk": 1}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("ran 2 queries, its budget is 1", logs.output[0])
+
+
+@override_settings(QUERY_BUDGETS_ENFORCED=True)
+class QueryBudgetTests(TestCase):
+    """
+    The main endpoints stay within their QUERY_BUDGETS.
+    """
+
+    def setUp(self):
+
+        self.client = APIClient()
+        cache.clear()
+        create_bookings()
+
+    def test_room_endpoints(self):
+
+        self.assertEqual(self.client.get(reverse("room-list")).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse("room-detail", kwargs={"pk": 1})).status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse("room-available"), data={"from_date": "2025-12-01", "to_date": "2025-12-03"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_booking_endpoints(self):
+
+        self.assertEqual(self.client.get(reverse("booking-list")).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse("booking-detail", kwargs={"pk": 1})).status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse("booking-list"),
+                                    data={"customer": 1, "room": 1, "from_date": "2026-01-01", "to_date": "2026-01-03"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.patch(reverse("booking-detail", kwargs={"pk": 1}), data={"to_date": "2025-12-12"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.put(reverse("booking-detail", kwargs={"pk": 2}),
+                                   data={"room": 2, "from_date": "2025-12-02", "to_date": "2025-12-12"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_user_endpoints(self):
+
+        self.assertEqual(self.client.get(reverse("user-list")).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse("user-detail", kwargs={"pk": 1})).status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse("user-list"),
+                                    data={"email": "new_user@example.com", "password": "testpassword"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+@override_settings(QUERY_BUDGETS={}) # session authentication adds queries
+class ProfilingMiddlewareTests(TestCase):
+
+    def setUp(self):
+
+        profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profiles_dir.cleanup)
+        self.profiles_dir = Path(profiles_dir.name)
+
+        profiling_settings = override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.profiles_dir,
+                                               PROFILING_MAX_PROFILES=2)
+        profiling_settings.enable()
+        self.addCleanup(profiling_settings.disable)
+
+        self.client = APIClient() # created after enabling profiling, the middleware chain is loaded on first use
+        cache.clear() # throttling counters
+        self.staff_user = User.objects.create(email="staff@example.com", password="testpassword", is_staff=True)
+        create_bookings()
+
+    def test_staff_request_with_header_is_profiled(self):
+
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get(reverse("booking-list"), HTTP_X_PROFILE="1")
+
+        profile_id = response["X-Profile-Id"]
+        self.assertRegex(profile_id, r"^\d{8}T\d{12}-GET-booking-list-[0-9a-f]{8}$")
+        self.assertTrue((self.profiles_dir / f"{profile_id}.prof").is_file())
+
+    def test_requests_are_not_profiled_without_header_or_staff(self):
+
+        response = self.client.get(reverse("booking-list"))
+        self.assertNotIn("X-Profile-Id", response)
+
+        self.client.force_login(User.objects.get(email="testuser1@example.com"))
+        response = self.client.get(reverse("booking-list"), HTTP_X_PROFILE="1")
+        self.assertNotIn("X-Profile-Id", response)
+
+        self.assertEqual(list(self.profiles_dir.iterdir()), [])
+
+    def test_staff_token_request_with_header_is_profiled(self):
+
+        response = self.client.get(reverse("booking-list"), HTTP_X_PROFILE="1",
+                                   HTTP_AUTHORIZATION=f"Token {create_token(self.staff_user)}")
+
+        self.assertIn("X-Profile-Id", response)
+
+    def test_anonymous_request_with_fake_credentials_is_not_profiled(self):
+
+        with mock.patch("cProfile.Profile") as profile:
+            for authorization in ["Token fake", "Bearer fake"]:
+                response = self.client.get(reverse("booking-list"), HTTP_X_PROFILE="1",
+                                           HTTP_AUTHORIZATION=authorization)
+                self.assertNotIn("X-Profile-Id", response)
+
+        profile.assert_not_called() # not even profiled and then dropped
+        self.assertEqual(list(self.profiles_dir.iterdir()), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_profiled(self):
+
+        response = self.client.get(reverse("booking-list"))
+
+        self.assertIn("X-Profile-Id", response)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_oldest_profiles_are_deleted(self):
+
+        profile_ids = [self.client.get(reverse("room-detail", kwargs={"pk": 1}))["X-Profile-Id"] for _ in range(3)]
+
+        self.assertEqual(sorted(path.stem for path in self.profiles_dir.iterdir()), sorted(profile_ids[1:]))
+
+    def test_download_profiles(self):
+
+        self.client.force_login(self.staff_user)
+        profile_id = self.client.get(reverse("booking-list"), HTTP_X_PROFILE="1")["X-Profile-Id"]
+
+        response = self.client.get(reverse("profile-list"))
+        self.assertEqual([profile["id"] for profile in response.json()], [profile_id])
+
+        response = self.client.get(reverse("profile-detail", kwargs={"pk": profile_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content),
+                         (self.profiles_dir / f"{profile_id}.prof").read_bytes())
+
+        response = self.client.get(reverse("profile-stats", kwargs={"pk": profile_id}), data={"limit": 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("function calls", response.content.decode())
+
+        response = self.client.get(reverse("profile-detail", kwargs={"pk": "unknown"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_profiles_are_only_for_staff(self):
+
+        response = self.client.get(reverse("profile-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient(raise_request_exception=False)
+        cache.clear()
+        registry.reset()
+        create_bookings()
+
+    def test_request_metrics(self):
+
+        self.client.get(reverse("booking-detail", kwargs={"pk": 1}))
+        self.client.get(reverse("booking-detail", kwargs={"pk": 2}))
+        self.client.get(reverse("booking-detail", kwargs={"pk": 100}))
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = response.content.decode().splitlines()
+        self.assertIn('http_requests_total{method="GET",route="booking-detail",status="200"} 2', metrics)
+        self.assertIn('http_requests_total{method="GET",route="booking-detail",status="404"} 1', metrics)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="booking-detail"} 3', metrics)
+        self.assertIn('db_queries_per_request_bucket{method="GET",route="booking-detail",le="1"} 0', metrics)
+        self.assertIn('db_queries_per_request_bucket{method="GET",route="booking-detail",le="2"} 3', metrics)
+        self.assertIn('db_queries_per_request_sum{method="GET",route="booking-detail"} 6', metrics)
+
+    def test_server_errors(self):
+
+        with mock.patch.object(BookingViewSet, "retrieve", side_effect=RuntimeError):
+            response = self.client.get(reverse("booking-detail", kwargs={"pk": 1}))
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        metrics = self.client.get(reverse("metrics")).content.decode().splitlines()
+        self.assertIn('http_request_errors_total{method="GET",route="booking-detail"} 1', metrics)
+
+    def test_histogram_buckets_are_cumulative(self):
+
+        metrics_registry = MetricsRegistry()
+        for duration in (0.003, 0.02, 0.02, 30):
+            metrics_registry.observe("http_request_duration_seconds", {"route": "room-list"}, duration)
+
+        metrics = metrics_registry.render().splitlines()
+
+        self.assertIn('http_request_duration_seconds_bucket{route="room-list",le="0.005"} 1', metrics)
+        self.assertIn('http_request_duration_seconds_bucket{route="room-list",le="0.025"} 3', metrics)
+        self.assertIn('http_request_duration_seconds_bucket{route="room-list",le="10"} 3', metrics)
+        self.assertIn('http_request_duration_seconds_bucket{route="room-list",le="+Inf"} 4', metrics)
+        self.assertIn('http_request_duration_seconds_sum{route="room-list"} 30.043', metrics)
+
+    def test_stores_of_ended_threads_are_added_up(self):
+
+        metrics_registry = MetricsRegistry()
+
+        def record():
+            metrics_registry.inc("http_requests_total", {"route": "room-list", "method": "GET", "status": "200"})
+
+        for _ in range(3):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(metrics_registry._stores, []) # no store left behind by the threads
+        self.assertIn('http_requests_total{method="GET",route="room-list",status="200"} 3',
+                      metrics_registry.render().splitlines())
+
+    def test_metrics_of_other_processes_are_added(self):
+
+        with tempfile.TemporaryDirectory() as metrics_dir, override_settings(METRICS_DIR=metrics_dir):
+            other_process = MetricsRegistry()
+            other_process.inc("http_requests_total", {"route": "room-list", "method": "GET", "status": "200"}, 5)
+            with mock.patch("os.getpid", return_value=-1):
+                other_process.flush()
+
+            metrics_registry = MetricsRegistry()
+            metrics_registry.inc("http_requests_total", {"route": "room-list", "method": "GET", "status": "200"})
+            metrics_registry.flush()
+
+            self.assertEqual(sorted(path.name for path in Path(metrics_dir).iterdir()), ["-1.json", f"{os.getpid()}.json"])
+            self.assertIn('http_requests_total{method="GET",route="room-list",status="200"} 6',
+                          metrics_registry.render().splitlines())
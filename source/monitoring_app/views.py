@@ -0,0 +1,10 @@
+from django.http import HttpResponse
+from .metrics import registry
+
+
+def metrics(request):
+    """
+    Request and database metrics of all the workers, in the Prometheus text format.
+    """
+
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
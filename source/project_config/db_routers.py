@@ -0,0 +1,75 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Primary/replica database routing. Reads of the hotel models (rooms, bookings and the reports built on them) go
+# to the DATABASE_REPLICA_ALIAS database when one is configured; writes always go to the primary. Requests that
+# write (and reads inside a transaction on the primary) keep reading from the primary, so they see their own writes.
+
+_pinned_to_primary = ContextVar("pinned_to_primary", default=False)
+
+
+class PrimaryReplicaRouter:
+
+    replica_app_labels = {"hotel_app"}
+
+    def db_for_read(self, model, **hints):
+
+        replica = settings.DATABASE_REPLICA_ALIAS
+
+        if (replica is None or model._meta.app_label not in self.replica_app_labels or _pinned_to_primary.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+
+        return replica
+
+    def db_for_write(self, model, **hints):
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+
+        return True # the replica holds the same data as the primary
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin every read of unsafe requests (POST, PUT, PATCH, DELETE) to the primary database (read-after-write).
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if request.method in self.safe_methods:
+            return self.get_response(request)
+
+        token = _pinned_to_primary.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
+
+    async def __acall__(self, request):
+
+        if request.method in self.safe_methods:
+            return await self.get_response(request)
+
+        token = _pinned_to_primary.set(True)
+        try:
+            return await self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,17 +42,23 @@ INSTALLED_APPS = [
     # local-apps
     "hotel_app.apps.HotelAppConfig",
     "users_app.apps.UsersAppConfig",
+    "monitoring_app.apps.MonitoringAppConfig",
 
     # third-party apps
     "rest_framework",
+    "django_filters",
 ]
 
 MIDDLEWARE = [
+    'monitoring_app.middleware.MetricsMiddleware',
+    'monitoring_app.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'project_config.db_routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'monitoring_app.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,9 +90,162 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # SQLite ignores SELECT ... FOR UPDATE, so take the write lock when the transaction begins to make
+            # the booking overlap check and the insert atomic (PostgreSQL/MySQL lock just the room row instead)
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'TEST': {
+            # a file (instead of the shared in-memory database) lets concurrent test connections wait for locks
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Read replica: reads of rooms, bookings and reports go to this database (e.g. HOTEL_API_REPLICA_DB=replica.sqlite3
+# to try it locally with a copy of db.sqlite3), writes go to the default database
+DATABASE_REPLICA_ALIAS = None
+
+if os.environ.get('HOTEL_API_REPLICA_DB'):
+    DATABASE_REPLICA_ALIAS = 'replica'
+    DATABASES[DATABASE_REPLICA_ALIAS] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['HOTEL_API_REPLICA_DB'],
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+
+DATABASE_ROUTERS = ['project_config.db_routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        # local memory is per process: use a shared backend (Redis, Memcached, ...) with several workers
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+ROOM_CACHE_ALIAS = 'default' # cache used for the room catalog
+ROOM_CACHE_TIMEOUT = 3600 # seconds (cached rooms are invalidated when they change)
+CALENDAR_CACHE_ALIAS = 'default' # cache of the booked nights of the rooms, by room and month
+CALENDAR_CACHE_TIMEOUT = 3600 # seconds (cached months are invalidated when their bookings change)
+# cache holding the version of the pricing rules: with the per-process default, a process only sees its own rule
+# changes right away, the others within PRICING_RULES_MAX_AGE (use a shared backend to get them right away)
+PRICING_CACHE_ALIAS = 'default'
+PRICING_RULES_MAX_AGE = 60 # seconds a process keeps its loaded pricing rules
+
+
+# Request instrumentation (monitoring_app.middleware.QueryInstrumentationMiddleware)
+
+SLOW_REQUEST_THRESHOLD_MS = 500 # slower requests are logged with their SQL
+
+# max number of queries per endpoint, by route name or "<METHOD> <route name>": exceeding requests are logged,
+# or fail if QUERY_BUDGETS_ENFORCED (meant for tests). Pricing budgets include the 2 queries reloading the pricing
+# rules after they change.
+QUERY_BUDGETS = {
+    'GET room-list': 1,
+    'GET room-detail': 2,
+    'GET room-available': 1,
+    'GET room-calendar': 2,
+    'GET booking-list': 1,
+    'POST booking-list': 10,
+    'GET booking-detail': 2,
+    'PUT booking-detail': 12,
+    'PATCH booking-detail': 11,
+    'POST quote-list': 4,
+    'GET user-list': 1,
+    'POST user-list': 3,
+    'GET user-detail': 1,
+}
+QUERY_BUDGETS_ENFORCED = False
+
+
+# Metrics (monitoring_app.middleware.MetricsMiddleware), scraped at /metrics
+
+# with several worker processes, a directory where every process writes its metrics for the others to read (clear
+# it when the server restarts), otherwise /metrics only reports the process answering the scrape
+METRICS_DIR = os.environ.get('HOTEL_API_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5 # seconds between two snapshots of the metrics of a process
+
+
+# Request profiling (monitoring_app.profiling.ProfilingMiddleware), profiles are listed at /api/monitoring/profiles/
+
+PROFILING_ENABLED = os.environ.get('HOTEL_API_PROFILING') == '1'
+PROFILING_HEADER = 'HTTP_X_PROFILE' # staff requests sending "X-Profile: 1" are profiled
+PROFILING_SAMPLE_RATE = 0.0 # share of all requests that are profiled
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_PROFILES = 200 # the oldest profiles are deleted
+# API credentials checked (before the view) for the staff requests sending the header
+PROFILING_AUTHENTICATION_CLASSES = ['users_app.api.authentication.SignedTokenAuthentication']
+
+
+# Authentication
+
+AUTHENTICATION_BACKENDS = ['users_app.backends.CachedModelBackend'] # users of sessions come from the user cache
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        'users_app.api.authentication.SignedTokenAuthentication', # tokens from /api/users/token/
+    ],
+    # reverse proxies in front of the server: anonymous clients are identified (e.g. by the throttles) by the
+    # address the last of them saw in X-Forwarded-For, or by REMOTE_ADDR without proxies (the header is ignored,
+    # clients could rotate it)
+    'NUM_PROXIES': int(os.environ.get('HOTEL_API_NUM_PROXIES', '0')),
+}
+
+API_TOKEN_MAX_AGE = 60 * 60 * 24 # seconds
+
+USER_CACHE_ALIAS = 'default' # cache of the users of authenticated requests
+USER_CACHE_TIMEOUT = 300 # seconds (cached users are invalidated when they change)
+
+# sessions are read from the cache, and from the database on a miss ('...signed_cookies' stores them in the cookie)
+SESSION_ENGINE = os.environ.get('HOTEL_API_SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+
+
+# Idempotency-Key support of the booking writes (hotel_app.api.idempotency)
+
+IDEMPOTENCY_CACHE_ALIAS = 'default' # must be shared by the worker processes
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24 # seconds a successful response is replayed for
+IDEMPOTENCY_IN_PROGRESS_TIMEOUT = 60 # seconds a key stays locked by a request that never finished
+
+
+# Throttling of the rooms, bookings and users endpoints (project_config.throttling), per user (or IP address) and
+# endpoint: "<requests>/<s|min|hour|day>" by "<read|write>_<burst|sustained>", or by "<basename>.<read|write>_<...>"
+# for a single endpoint (e.g. 'booking.read_burst'). Counters are kept in the API_THROTTLE_CACHE_ALIAS cache, which
+# must be shared by the worker processes (Redis, Memcached, ...) for the limits to hold across them.
+
+API_THROTTLE_RATES = {
+    'read_burst': '120/min',
+    'read_sustained': '5000/hour',
+    'write_burst': '30/min',
+    'write_sustained': '1000/hour',
+}
+
+if os.environ.get('HOTEL_API_THROTTLING') == '0': # e.g. for load tests
+    API_THROTTLE_RATES = {}
+
+API_THROTTLE_CACHE_ALIAS = 'default'
+
+
+# Users
+
+# create user profiles on first access (CustomUser.get_profile) instead of with the users
+USER_PROFILE_LAZY_CREATION = False
+
+
+# Bulk user import (POST /api/users/import/ and the import_users command)
+
+USER_IMPORT_BATCH_SIZE = 1000 # users hashed and inserted at a time
+USER_IMPORT_WORKERS = None # password hashing processes of the command, one per core by default
+USER_IMPORT_HTTP_WORKERS = 2 # password hashing processes of each request to the endpoint (1: in the web worker)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -128,4 +288,10 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-AUTH_USER_MODEL = 'users_app.CustomUser'
\ No newline at end of file
+AUTH_USER_MODEL = 'users_app.CustomUser'
+
+
+# Pagination of the list endpoints
+
+API_PAGE_SIZE = 100 # default page size
+API_MAX_PAGE_SIZE = 1000 # upper limit for the ?page_size= query parameter
\ No newline at end of file
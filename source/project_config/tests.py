@@ -0,0 +1,177 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from hotel_app.models import Room, Booking
+from .db_routers import PrimaryReplicaRouter, ReplicaPinningMiddleware
+from .throttling import parse_rate
+from unittest.mock import patch
+
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica")
+class PrimaryReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+
+        self.router = PrimaryReplicaRouter()
+
+    def read_db_during_request(self, method: str) -> str:
+        """
+        Database chosen for reading bookings while the middleware handles a request.
+        """
+
+        databases = []
+
+        def view(request):
+            databases.append(self.router.db_for_read(Booking))
+            return HttpResponse()
+
+        ReplicaPinningMiddleware(view)(RequestFactory().generic(method, "/"))
+
+        return databases[0]
+
+    def test_hotel_reads_go_to_the_replica(self):
+
+        self.assertEqual(self.router.db_for_read(Room), "replica")
+        self.assertEqual(self.router.db_for_read(Booking), "replica")
+        self.assertEqual(self.router.db_for_read(User), "default")
+
+    def test_writes_go_to_the_primary(self):
+
+        self.assertEqual(self.router.db_for_write(Room), "default")
+        self.assertEqual(self.router.db_for_write(Booking), "default")
+
+    def test_reads_inside_a_transaction_go_to_the_primary(self):
+
+        with patch.object(connection, "in_atomic_block", True):
+            self.assertEqual(self.router.db_for_read(Booking), "default")
+
+    def test_unsafe_requests_read_from_the_primary(self):
+
+        self.assertEqual(self.read_db_during_request("GET"), "replica")
+        self.assertEqual(self.read_db_during_request("POST"), "default")
+        self.assertEqual(self.read_db_during_request("PATCH"), "default")
+
+        # the pin doesn't outlive the request
+        self.assertEqual(self.router.db_for_read(Booking), "replica")
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_reads_go_to_the_primary_without_replica(self):
+
+        self.assertEqual(self.router.db_for_read(Booking), "default")
+
+
+@override_settings(API_THROTTLE_RATES={"read_burst": "3/min", "read_sustained": "4/hour", "write_burst": "1/min",
+                                       "booking.read_burst": "1/min"})
+class ThrottlingTests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+        cache.clear()
+
+    def test_parse_rate(self):
+
+        self.assertEqual(parse_rate("100/min"), (100, 60))
+        self.assertEqual(parse_rate("5/s"), (5, 1))
+        self.assertEqual(parse_rate("1000/day"), (1000, 86400))
+
+    def test_burst_rate(self):
+
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse("room-list")).status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse("room-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 60)
+
+    @patch("project_config.throttling.time.time")
+    def test_sustained_rate(self, now):
+
+        # bursts of 3 requests a minute, until 4 in the hour
+        statuses = []
+        for minute in range(3):
+            now.return_value = 3600 * 1000 + 60 * minute
+            statuses += [self.client.get(reverse("room-list")).status_code for _ in range(2)]
+
+        self.assertEqual(statuses, [200, 200, 200, 200, 429, 429])
+
+    def test_writes_are_counted_apart(self):
+
+        self.client.get(reverse("user-list"))
+
+        statuses = [self.client.post(reverse("user-list"), data={"email": f"user{i}@example.com", "password": "pw"})
+                    .status_code for i in range(2)]
+
+        self.assertEqual(statuses, [status.HTTP_201_CREATED, status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_endpoint_rate(self):
+
+        self.assertEqual(self.client.get(reverse("booking-list")).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse("booking-list")).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # other endpoints have their own counters
+        self.assertEqual(self.client.get(reverse("room-list")).status_code, status.HTTP_200_OK)
+
+    def test_clients_are_counted_apart(self):
+
+        self.client.get(reverse("booking-list"))
+
+        user = User.objects.create_user(email="user@example.com", password="testpassword")
+        self.client.force_authenticate(user=user)
+        self.assertEqual(self.client.get(reverse("booking-list")).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse("booking-list"), REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_forwarded_for_header_is_not_trusted_without_proxies(self):
+
+        self.client.get(reverse("booking-list"), HTTP_X_FORWARDED_FOR="10.0.0.2")
+
+        response = self.client.get(reverse("booking-list"), HTTP_X_FORWARDED_FOR="10.0.0.3")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1})
+    def test_clients_behind_a_proxy_are_counted_apart(self):
+
+        self.client.get(reverse("booking-list"), HTTP_X_FORWARDED_FOR="10.0.0.2")
+
+        response = self.client.get(reverse("booking-list"), HTTP_X_FORWARDED_FOR="10.0.0.3")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_token_endpoint_has_the_write_rates(self):
+
+        credentials = {"email": "user@example.com", "password": "wrong"}
+
+        self.assertEqual(self.client.post(reverse("token"), data=credentials).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(reverse("token"), data=credentials).status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+
+    async def test_async_endpoints_share_the_counters_of_their_endpoint(self):
+
+        response = await self.async_client.get(reverse("async-booking-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = await self.async_client.get(reverse("async-booking-detail", kwargs={"pk": 1}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 60)
+
+        response = await self.async_client.get(reverse("async-room-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(API_THROTTLE_RATES={})
+    def test_throttling_can_be_disabled(self):
+
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse("booking-list")).status_code, status.HTTP_200_OK)
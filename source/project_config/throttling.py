@@ -0,0 +1,142 @@
+import functools
+import math
+import time
+from types import SimpleNamespace
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """
+    "<requests>/<period>" (period: s, m, h or d, e.g. "100/min") as (requests, seconds).
+    """
+
+    requests, period = rate.split("/")
+
+    return int(requests), PERIODS[period[0]]
+
+
+class CacheRateThrottle(BaseThrottle):
+    """
+    Fixed window throttle counting the requests of every client (user, or IP address of anonymous requests) per
+    endpoint (viewset basename) in the cache: the counter of the current window is created with cache.add and
+    bumped with cache.incr, which are atomic in the shared backends (Redis, Memcached), so every worker process
+    counts in the same place. Reads and writes have their own counters and rates, so writes can be stricter.
+
+    Views whose writes don't change anything (e.g. quotes, POSTed for their large bodies) set read_only_writes so
+    they are counted as reads.
+
+    Rates are read from API_THROTTLE_RATES on every request, first under "<basename>.<read|write>_<window>" (e.g.
+    "booking.read_burst"), then under "<read|write>_<window>"; a missing rate disables the throttle. Denied requests
+    get a 429 response with a Retry-After header (the end of the window).
+    """
+
+    window = None # "burst" or "sustained"
+
+    def __init__(self):
+
+        self.wait_seconds = None
+
+    def rate_name(self, request, view) -> str:
+
+        is_read = request.method in SAFE_METHODS or getattr(view, "read_only_writes", False)
+
+        return f"{'read' if is_read else 'write'}_{self.window}"
+
+    def client_ident(self, request) -> str:
+
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+
+        # X-Forwarded-For is only trusted up to the NUM_PROXIES proxies of the deployment
+        return f"ip:{self.get_ident(request).replace(' ', '')}"
+
+    def allow_request(self, request, view):
+
+        basename = getattr(view, "basename", None) or view.__class__.__name__
+        rate_name = self.rate_name(request, view)
+        rate = settings.API_THROTTLE_RATES.get(f"{basename}.{rate_name}", settings.API_THROTTLE_RATES.get(rate_name))
+
+        if rate is None:
+            return True
+
+        requests, duration = parse_rate(rate)
+        now = time.time()
+        window = int(now // duration)
+        key = f"throttle:{basename}:{rate_name}:{self.client_ident(request)}:{window}"
+        cache = caches[settings.API_THROTTLE_CACHE_ALIAS]
+
+        cache.add(key, 0, timeout=duration)
+        try:
+            count = cache.incr(key)
+        except ValueError: # the key was evicted between add and incr
+            cache.add(key, 1, timeout=duration)
+            count = 1
+
+        if count <= requests:
+            return True
+
+        self.wait_seconds = (window + 1) * duration - now
+
+        return False
+
+    def wait(self):
+
+        return self.wait_seconds
+
+
+class BurstRateThrottle(CacheRateThrottle):
+
+    window = "burst"
+
+
+class SustainedRateThrottle(CacheRateThrottle):
+
+    window = "sustained"
+
+
+def throttle_wait(request, view) -> float | None:
+    """
+    Count the request in the burst and sustained windows: seconds to wait if any of them is over its rate, None if
+    the request is allowed.
+    """
+
+    waits = [throttle.wait() for throttle in (BurstRateThrottle(), SustainedRateThrottle())
+             if not throttle.allow_request(request, view)]
+
+    return max(waits) if waits else None
+
+
+def async_throttled(basename: str):
+    """
+    Throttle a plain Django async view (DRF views have throttle_classes) like the DRF endpoint with this basename:
+    both share the counters and the rates of the client.
+    """
+
+    view = SimpleNamespace(basename=basename)
+
+    def decorator(view_func):
+
+        @functools.wraps(view_func)
+        async def throttled_view(request, *args, **kwargs):
+
+            # the cache and the session user are read synchronously
+            wait = await sync_to_async(throttle_wait)(request, view)
+
+            if wait is not None:
+                wait = math.ceil(wait)
+                return JsonResponse({"detail": f"Request was throttled. Expected available in {wait} seconds."},
+                                    status=429, headers={"Retry-After": str(wait)})
+
+            return await view_func(request, *args, **kwargs)
+
+        return throttled_view
+
+    return decorator
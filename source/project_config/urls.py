@@ -16,10 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from monitoring_app.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("api/users/", include("users_app.api.urls")),
+    path("api/monitoring/", include("monitoring_app.api.urls")),
     path("api/", include("hotel_app.api.urls")),
     path("api-auth/", include("rest_framework.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
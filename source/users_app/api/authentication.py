@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from ..cache import get_user
+
+
+User = get_user_model()
+
+TOKEN_SALT = "users_app.api.token"
+
+
+def create_token(user) -> str:
+    """
+    Signed token identifying the user. It holds part of the session auth hash (derived from the password hash), so
+    changing the password revokes the tokens; they also expire after API_TOKEN_MAX_AGE seconds.
+    """
+
+    return signing.dumps({"id": user.pk, "hash": user.get_session_auth_hash()[:16]}, salt=TOKEN_SALT, compress=True)
+
+
+def fetch_user(user_id):
+
+    return User._default_manager.filter(pk=user_id).first()
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate "Authorization: Token <token>" requests with the tokens of the token endpoint. Tokens are checked
+    without the database (signature and expiry), and users come from the user cache.
+    """
+
+    keyword = "Token"
+
+    def authenticate(self, request):
+
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        try:
+            payload = signing.loads(auth[1].decode(), salt=TOKEN_SALT, max_age=settings.API_TOKEN_MAX_AGE)
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed("Token expired.")
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        user = get_user(payload["id"], fetch_user)
+
+        if user is None or not user.is_active or not constant_time_compare(payload["hash"],
+                                                                           user.get_session_auth_hash()[:16]):
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        return user, None
+
+    def authenticate_header(self, request):
+
+        return self.keyword
@@ -1,3 +1,5 @@
+from django.contrib.auth import authenticate
+from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from ..models import CustomUser
 
@@ -7,3 +9,20 @@ class UserSerializer(ModelSerializer):
         model = CustomUser
         fields = ('id', 'email', 'password')
         extra_kwargs = {'password': {'write_only': True}}
+
+
+class TokenObtainSerializer(serializers.Serializer):
+
+    email = serializers.EmailField()
+    password = serializers.CharField(trim_whitespace=False, write_only=True)
+
+    def validate(self, attrs):
+
+        user = authenticate(self.context.get("request"), email=attrs["email"], password=attrs["password"])
+
+        if user is None:
+            raise serializers.ValidationError("Unable to log in with the provided credentials.")
+
+        attrs["user"] = user
+
+        return attrs
@@ -1,8 +1,18 @@
-from django.test import TestCase
+import json
+from unittest.mock import patch
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.urls import reverse, resolve
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 from django.contrib.auth import get_user_model
+from ..hashing import PasswordHasherPool
+from ..models import UserProfile
+from .authentication import SignedTokenAuthentication
 from .serializers import UserSerializer
 from .views import UserViewSet
 
@@ -15,6 +25,7 @@ class UserAPITests(TestCase):
     def setUp(self):
 
         self.client = APIClient()
+        cache.clear() # throttling counters
         self.payload = {"email": "test_user@example.com", "password": "testpassword"}
 
     @staticmethod
@@ -160,3 +171,204 @@ class UserAPITests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(User.objects.count(),1)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], USER_IMPORT_BATCH_SIZE=2,
+                   USER_IMPORT_HTTP_WORKERS=1)
+class UserImportAPITests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+        cache.clear() # throttling counters
+        staff_user = User.objects.create(email="staff@example.com", password="testpassword", is_staff=True)
+        self.client.force_authenticate(user=staff_user)
+
+    @staticmethod
+    def events(response) -> list[dict]:
+
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_import_users(self):
+
+        rows = [
+            {"email": "user1@EXAMPLE.com", "password": "password1"},
+            {"email": "not an email", "password": "password2"},
+            {"email": "staff@example.com", "password": "password3"}, # already exists
+            {"email": "user1@example.com", "password": "password4"}, # repeated
+            {"email": "user2@example.com", "password": "password5"},
+        ]
+
+        response = self.client.post(reverse("user-import"), data=rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(self.events(response), [
+            {"row": 2, "errors": {"email": ["Enter a valid email address."]}},
+            {"processed": 2, "created": 1},
+            {"row": 3, "errors": {"email": ["user with this email already exists."]}},
+            {"row": 4, "errors": {"email": ["user with this email already exists."]}},
+            {"processed": 4, "created": 1},
+            {"processed": 5, "created": 2},
+        ])
+
+        user = User.objects.get(email="user1@example.com") # normalized
+        self.assertTrue(user.check_password("password1"))
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+        self.assertTrue(User.objects.get(email="user2@example.com").check_password("password5"))
+
+    def test_import_users_from_csv(self):
+
+        file = SimpleUploadedFile("users.csv", b"email,password\nuser1@example.com,password1\n,password2\n",
+                                  content_type="text/csv")
+
+        response = self.client.post(reverse("user-import"), data={"file": file}, format="multipart")
+
+        self.assertEqual(self.events(response), [
+            {"row": 2, "errors": {"email": ["This field is required."]}},
+            {"processed": 2, "created": 1},
+        ])
+        self.assertTrue(User.objects.get(email="user1@example.com").check_password("password1"))
+
+    def test_import_needs_a_list_or_a_file(self):
+
+        response = self.client.post(reverse("user-import"), data={"email": "user1@example.com"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_rows_must_be_objects(self):
+
+        response = self.client.post(reverse("user-import"), data=[{"email": "user1@example.com"}, "user2@example.com"],
+                                    format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(email="user1@example.com").exists())
+
+    def test_import_reports_emails_taken_by_concurrent_writes(self):
+
+        rows = [
+            {"email": "user1@example.com", "password": "password1"},
+            {"email": "user2@example.com", "password": "password2"},
+        ]
+
+        def hash_passwords(hasher, passwords):
+
+            # another request creates user2 between the email check and the insert
+            User.objects.create(email="user2@example.com", password="testpassword")
+            return [make_password(password) for password in passwords]
+
+        with patch.object(PasswordHasherPool, "hash", hash_passwords):
+            response = self.client.post(reverse("user-import"), data=rows, format="json")
+            events = self.events(response)
+
+        self.assertEqual(events, [
+            {"row": 2, "errors": {"email": ["user with this email already exists."]}},
+            {"processed": 2, "created": 1},
+        ])
+        self.assertTrue(User.objects.get(email="user1@example.com").check_password("password1"))
+        self.assertTrue(UserProfile.objects.filter(user__email="user1@example.com").exists())
+        self.assertEqual(User.objects.filter(email="user2@example.com").count(), 1)
+
+    def test_import_is_only_for_staff(self):
+
+        self.client.force_authenticate(user=None)
+
+        response = self.client.post(reverse("user-import"), data=[], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+        cache.clear()
+        self.user = User.objects.create_user(email="staff@example.com", password="testpassword")
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+
+    def get_token(self) -> str:
+
+        response = self.client.post(reverse("token"), data={"email": "staff@example.com", "password": "testpassword"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.json()["token"]
+
+    def authenticate(self, token: str):
+
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {token}")
+
+        return SignedTokenAuthentication().authenticate(Request(request))
+
+    def test_token_route_is_not_a_user_detail(self):
+
+        self.assertEqual(resolve(reverse("token")).url_name, "token")
+
+    def test_cant_get_token_with_wrong_password(self):
+
+        response = self.client.post(reverse("token"), data={"email": "staff@example.com", "password": "wrong"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requests_with_token(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.get_token()}")
+
+        # staff only endpoint: the request is authenticated and the (empty) import rejected
+        response = self.client.post(reverse("user-import"), data={}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # 403 rather than 401: session authentication comes first and has no WWW-Authenticate challenge
+        self.client.credentials(HTTP_AUTHORIZATION="Token not-a-token")
+        response = self.client.post(reverse("user-import"), data={}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.json(), {"detail": "Invalid token."})
+
+    def test_users_are_cached(self):
+
+        token = self.get_token()
+        self.assertEqual(self.authenticate(token)[0], self.user)
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(token)
+
+        self.assertTrue(user.is_staff)
+
+    def test_cached_users_are_invalidated(self):
+
+        token = self.get_token()
+        self.authenticate(token)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_changing_the_password_revokes_tokens(self):
+
+        token = self.get_token()
+        self.authenticate(token)
+
+        self.user.set_password("newpassword")
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    @override_settings(API_TOKEN_MAX_AGE=-1)
+    def test_expired_token(self):
+
+        with self.assertRaisesMessage(AuthenticationFailed, "Token expired."):
+            self.authenticate(self.get_token())
+
+    @override_settings(QUERY_BUDGETS={}) # the first request fills the cache
+    def test_session_requests_use_the_cache(self):
+
+        self.client.force_login(self.user)
+        self.client.get(reverse("user-detail", kwargs={"pk": self.user.pk}))
+
+        # the session and its user come from the cache: only the user-detail query is left
+        with self.assertNumQueries(1):
+            self.client.get(reverse("user-detail", kwargs={"pk": self.user.pk}))
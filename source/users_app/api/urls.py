@@ -1,4 +1,4 @@
-from .views import UserViewSet
+from .views import TokenView, UserViewSet
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
@@ -7,5 +7,6 @@ router = DefaultRouter()
 router.register(r"", UserViewSet, basename="user")
 
 urlpatterns = [
+    path("token/", TokenView.as_view(), name="token"), # before the router, whose detail route would match it
     path("", include(router.urls)),
 ]
@@ -1,6 +1,18 @@
-from rest_framework import viewsets
+import csv
+import io
+import json
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer
+from project_config.throttling import BurstRateThrottle, SustainedRateThrottle
+from ..importing import import_users
+from .authentication import create_token
+from .serializers import TokenObtainSerializer, UserSerializer
 
 # Create your views here.
 
@@ -10,4 +22,47 @@ User = get_user_model()
 class UserViewSet(viewsets.ModelViewSet):
 
     queryset = User.objects.all()
-    serializer_class = UserSerializer
\ No newline at end of file
+    serializer_class = UserSerializer
+    throttle_classes = [BurstRateThrottle, SustainedRateThrottle]
+
+    @action(detail=False, methods=["post"], url_path="import", url_name="import",
+            permission_classes=[permissions.IsAdminUser], parser_classes=[JSONParser, MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Bulk user import (staff only): POST /users/import/ with a JSON list of {"email", "password"} or a CSV "file"
+        with email and password columns. The progress and the rejected rows are streamed as NDJSON.
+        """
+
+        if "file" in request.FILES:
+            rows = csv.DictReader(io.TextIOWrapper(request.FILES["file"].file, encoding="utf-8-sig"))
+        elif isinstance(request.data, list) and all(isinstance(row, dict) for row in request.data):
+            rows = request.data
+        else:
+            # rejected before streaming: errors can't change the status of a response that has started
+            return Response({"detail": "Expected a list of users or a CSV file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # a small pool: every concurrent import of every web worker starts its own
+        events = import_users(rows, batch_size=settings.USER_IMPORT_BATCH_SIZE,
+                              workers=settings.USER_IMPORT_HTTP_WORKERS)
+
+        return StreamingHttpResponse((json.dumps(event) + "\n" for event in events),
+                                     content_type="application/x-ndjson")
+
+
+class TokenView(APIView):
+    """
+    Signed API token of a user: POST /users/token/ with email and password, then send "Authorization: Token <token>".
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [BurstRateThrottle, SustainedRateThrottle] # write rates, which bound password guesses
+    basename = "token" # throttle rates: "token.write_burst", ...
+
+    def post(self, request):
+
+        serializer = TokenObtainSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        return Response({"token": create_token(serializer.validated_data["user"]),
+                         "expires_in": settings.API_TOKEN_MAX_AGE})
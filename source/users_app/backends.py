@@ -0,0 +1,14 @@
+from django.contrib.auth.backends import ModelBackend
+from .cache import get_user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend reading the users of authenticated sessions from the user cache instead of the database.
+    """
+
+    def get_user(self, user_id):
+
+        user = get_user(user_id, super().get_user)
+
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,40 @@
+from collections.abc import Iterable
+from django.conf import settings
+from django.core.cache import caches
+
+# Cache of the users looked up by the API authentication (signed tokens and sessions), so that authenticated
+# requests don't need a user SELECT each. A cached user is deleted whenever it changes (see the receivers in
+# models.py): deleted right away, and once more when the transaction commits, in case a concurrent request cached
+# the old row in between. The cache alias is configurable with USER_CACHE_ALIAS.
+
+_missing = object()
+
+
+def get_cache():
+
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_key(user_id) -> str:
+
+    return f"users:user:{user_id}"
+
+
+def get_user(user_id, fetch):
+    """
+    Cached user (or None if it doesn't exist, which is cached too), fetched with fetch(user_id) on a miss.
+    """
+
+    cache = get_cache()
+    user = cache.get(user_key(user_id), _missing)
+
+    if user is _missing:
+        user = fetch(user_id)
+        cache.set(user_key(user_id), user, timeout=settings.USER_CACHE_TIMEOUT)
+
+    return user
+
+
+def invalidate_users(user_ids: Iterable) -> None:
+
+    get_cache().delete_many([user_key(user_id) for user_id in user_ids])
@@ -1,5 +1,6 @@
+from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
-from .models import CustomUser
+from .models import CustomUser, CustomUserManager
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -14,3 +15,16 @@ class CustomUserChangeForm(UserChangeForm):
     class Meta:
         model = CustomUser
         fields = ("email", )
+
+
+class UserImportForm(forms.Form):
+    """
+    A row of a bulk user import (the password is hashed by the import).
+    """
+
+    email = forms.EmailField(max_length=100)
+    password = forms.CharField(strip=False)
+
+    def clean_email(self):
+
+        return CustomUserManager.normalize_email(self.cleaned_data["email"])
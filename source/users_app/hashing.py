@@ -0,0 +1,55 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+
+
+# this module doesn't import models: spawned pool workers import it before Django is set up
+
+
+def setup_worker() -> None:
+    """
+    Set Django up in a pool worker (forked workers inherit it, spawned ones start without it).
+    """
+
+    if not apps.ready:
+        django.setup()
+
+
+class PasswordHasherPool:
+    """
+    Hash passwords with the configured hasher in a pool of processes (one per core by default). PBKDF2 is slow on
+    purpose, so hashing is what bounds bulk user creation. With workers=1 the passwords are hashed in this process.
+
+        with PasswordHasherPool() as hasher:
+            hashes = hasher.hash(passwords)
+    """
+
+    def __init__(self, workers: int | None = None):
+
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+
+    def __enter__(self):
+
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=setup_worker)
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def hash(self, passwords: list[str]) -> list[str]:
+
+        if self.executor is None or len(passwords) < 2:
+            return [make_password(password) for password in passwords]
+
+        # a few chunks per worker keep the workers busy without pickling every password separately
+        chunk_size = max(1, len(passwords) // (self.workers * 4))
+
+        return list(self.executor.map(make_password, passwords, chunksize=chunk_size))
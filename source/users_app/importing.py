@@ -0,0 +1,68 @@
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from .forms import UserImportForm
+from .hashing import PasswordHasherPool
+
+
+User = get_user_model()
+
+
+def import_users(rows: Iterable[dict], batch_size: int = 1000, workers: int | None = None) -> Iterator[dict]:
+    """
+    Create users (and their profiles) from {"email", "password"} rows, batch by batch: the rows of a batch are
+    validated, their passwords hashed in a process pool and the users inserted with bulk_create (which creates the
+    profiles too).
+
+    Yields {"row": <1-based row number>, "errors": {...}} for every rejected row (invalid, or email already taken)
+    and {"processed": <rows>, "created": <users>} after every batch, so that callers can stream the progress.
+    """
+
+    taken_email_errors = {"email": ["user with this email already exists."]}
+
+    processed = created = 0
+    seen_emails = set()
+    rows = iter(rows)
+
+    with PasswordHasherPool(workers) as hasher:
+        while batch := list(islice(rows, batch_size)):
+            valid_rows = [] # (row number, validated data)
+            for number, row in enumerate(batch, start=processed + 1):
+                form = UserImportForm(data=row)
+                if form.is_valid():
+                    valid_rows.append((number, form.cleaned_data))
+                else:
+                    yield {"row": number, "errors": {field: list(errors) for field, errors in form.errors.items()}}
+
+            taken_emails = seen_emails | set(
+                User.objects.filter(email__in=[data["email"] for _, data in valid_rows]).values_list("email", flat=True)
+            )
+            new_users = [] # (row number, user)
+            for number, data in valid_rows:
+                if data["email"] in taken_emails:
+                    yield {"row": number, "errors": taken_email_errors}
+                else:
+                    taken_emails.add(data["email"])
+                    new_users.append((number, User(email=data["email"], password=data["password"])))
+
+            for (_, user), password_hash in zip(new_users, hasher.hash([user.password for _, user in new_users])):
+                user.password = password_hash
+
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([user for _, user in new_users]) # creates the profiles too
+                created += len(new_users)
+            except IntegrityError:
+                # emails taken by concurrent writes since they were checked: insert the users one by one
+                for number, user in new_users:
+                    try:
+                        with transaction.atomic():
+                            User.objects.bulk_create([user])
+                        created += 1
+                    except IntegrityError:
+                        yield {"row": number, "errors": taken_email_errors}
+
+            seen_emails = taken_emails
+            processed += len(batch)
+            yield {"processed": processed, "created": created}
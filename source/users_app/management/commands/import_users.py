@@ -0,0 +1,41 @@
+import csv
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users_app.importing import import_users
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Create users from a CSV file with email and password columns. Passwords are hashed in a process pool and "
+        "users and profiles are inserted in batches; rejected rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument("path", help="CSV file to import.")
+        parser.add_argument("--batch-size", type=int, default=settings.USER_IMPORT_BATCH_SIZE,
+                            help="Users inserted per query.")
+        parser.add_argument("--workers", type=int, default=settings.USER_IMPORT_WORKERS,
+                            help="Password hashing processes (default: one per core, 1 hashes in this process).")
+
+    def handle(self, *args, **options):
+
+        start = time.perf_counter()
+        rejected = 0
+
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as file:
+                for event in import_users(csv.DictReader(file), batch_size=options["batch_size"],
+                                          workers=options["workers"]):
+                    if "errors" in event:
+                        rejected += 1
+                        self.stderr.write(f"Row {event['row']}: {event['errors']}")
+                    else:
+                        self.stdout.write(f"Processed {event['processed']} rows, created {event['created']} users")
+        except OSError as error:
+            raise CommandError(error)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"Done in {elapsed:.2f}s, {rejected} rows rejected.")
@@ -1,20 +1,57 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from .cache import invalidate_users
 
 
 # Create your models here.
-class CustomUserManager(BaseUserManager):
+class CustomUserQuerySet(models.QuerySet):
 
-    def create_user(self, email, password=None):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        bulk_create doesn't send post_save: create the profiles of the new users here (unless they are created
+        lazily). Users skipped with ignore_conflicts=True get no primary key, and no profile.
+        """
+
+        if settings.USER_PROFILE_LAZY_CREATION:
+            users = super().bulk_create(objs, *args, **kwargs)
+        else:
+            # no savepoint: the profiles fail or succeed with the users
+            with transaction.atomic(using=self.db, savepoint=False):
+                users = super().bulk_create(objs, *args, **kwargs)
+                UserProfile.objects.using(self.db).bulk_create(
+                    [UserProfile(user=user) for user in users if user.pk is not None],
+                    batch_size=kwargs.get("batch_size"),
+                )
+
+        # ids looked up before the users existed are cached as missing
+        invalidate_users(user.pk for user in users if user.pk is not None)
+
+        return users
+
+    def update(self, **kwargs):
+
+        # update() doesn't send the signals that invalidate the user cache
+        user_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        invalidate_users(user_ids)
+        transaction.on_commit(lambda: invalidate_users(user_ids), using=self.db)
+
+        return rows
+
+
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
+
+    def create_user(self, email, password=None, **extra_fields):
 
         if not email:
             raise ValueError("Users must have an email address")
 
         email = self.normalize_email(email)
-        user = self.model(email=email)
+        user = self.model(email=email, **extra_fields)
         user.set_password(password)
         user.save()
 
@@ -22,12 +59,8 @@ class CustomUserManager(BaseUserManager):
 
     def create_superuser(self, email, password):
 
-        user = self.create_user(email, password)
-        user.is_staff = True
-        user.is_superuser = True
-        user.save()
-
-        return user
+        # a single save
+        return self.create_user(email, password, is_staff=True, is_superuser=True)
 
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
@@ -47,6 +80,17 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def get_profile(self) -> "UserProfile":
+        """
+        Profile of the user, created on first access if it doesn't exist yet (see USER_PROFILE_LAZY_CREATION).
+        """
+
+        try:
+            return self.userprofile
+        except UserProfile.DoesNotExist:
+            self.userprofile, _ = UserProfile.objects.get_or_create(user=self)
+            return self.userprofile
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField("users_app.CustomUser", on_delete=models.CASCADE)
@@ -61,6 +105,16 @@ class UserProfile(models.Model):
 
 
 @receiver(post_save, sender=CustomUser)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+
+    # updates (e.g. last_login on every login) don't touch the profile, nor do fixtures (they carry the profiles)
+    if created and not raw and not settings.USER_PROFILE_LAZY_CREATION:
+        UserProfile.objects.create(user=instance)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_user_cache(sender, instance, using, **kwargs):
 
-    UserProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+    user_id = instance.pk # the pk of a deleted user is cleared before the transaction commits
+    invalidate_users([user_id])
+    transaction.on_commit(lambda: invalidate_users([user_id]), using=using)
@@ -1,4 +1,8 @@
-from django.test import TestCase
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import update_last_login
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from .models import CustomUser, UserProfile
 from django.db.utils import IntegrityError
@@ -94,4 +98,82 @@ class UserModelTests(TestCase):
         with self.assertRaises(IntegrityError):
             self.create_user(self.payload) # try to create a user with the same email
 
-        # self.assertEqual(User.objects.count(), 1)
\ No newline at end of file
+        # self.assertEqual(User.objects.count(), 1)
+
+
+class UserProfileQueryTests(TestCase):
+
+    def setUp(self):
+
+        self.payload = {"email": 'test_user@example.com', "password": 'testpassword'}
+
+    def test_create_user_inserts_the_profile(self):
+
+        with self.assertNumQueries(2): # user and profile
+            user = User.objects.create_user(**self.payload)
+
+        self.assertEqual(user.get_profile(), UserProfile.objects.get(user=user))
+
+    def test_create_superuser_saves_once(self):
+
+        with self.assertNumQueries(2):
+            User.objects.create_superuser(**self.payload)
+
+    def test_updates_dont_query_the_profile(self):
+
+        user = User.objects.create_user(**self.payload)
+
+        with self.assertNumQueries(1):
+            user.save()
+
+        with self.assertNumQueries(1):
+            update_last_login(None, user) # on every login
+
+        self.assertEqual(UserProfile.objects.count(), 1)
+
+    def test_bulk_create_creates_profiles(self):
+
+        users = [User(email=f"test_user{i}@example.com", password="testpassword") for i in range(1, 4)]
+
+        with self.assertNumQueries(2): # all the users, then all the profiles
+            User.objects.bulk_create(users)
+
+        self.assertEqual(set(UserProfile.objects.values_list("user_id", flat=True)), {user.pk for user in users})
+
+    @override_settings(USER_PROFILE_LAZY_CREATION=True)
+    def test_lazy_profile_creation(self):
+
+        with self.assertNumQueries(1):
+            user = User.objects.create_user(**self.payload)
+        User.objects.bulk_create([User(email="test_user2@example.com", password="testpassword")])
+
+        self.assertEqual(UserProfile.objects.count(), 0)
+
+        user = User.objects.get(pk=user.pk)
+        profile = user.get_profile() # created on first access
+        self.assertEqual(UserProfile.objects.get(), profile)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_profile(), profile)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportUsersCommandTests(TestCase):
+
+    def test_import_users_command(self):
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("email,password\n")
+            file.writelines(f"user{i}@example.com,password{i}\n" for i in range(1, 11))
+            file.write("user1@example.com,password\n") # repeated
+            file.flush()
+
+            output, errors = StringIO(), StringIO()
+            # two hashing processes
+            call_command("import_users", file.name, batch_size=4, workers=2, stdout=output, stderr=errors)
+
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(UserProfile.objects.count(), 10)
+        self.assertTrue(User.objects.get(email="user7@example.com").check_password("password7"))
+        self.assertIn("Processed 11 rows, created 10 users", output.getvalue())
+        self.assertIn("Row 11: {'email': ['user with this email already exists.']}", errors.getvalue())